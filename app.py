@@ -1,78 +1,263 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, abort, g, make_response, render_template, request, jsonify
+from catalog import CATALOG
 from csfloat_scraper import CSFloatScraper
-from investment_manager import load_investments, save_investments, add_investment, remove_investment, update_investment, add_transaction
+from price_refresher import PriceRefresher
+from portfolio_registry import DEFAULT_PORTFOLIO_ID, PortfolioRegistry
+from metrics import HTTP_REQUEST_SECONDS, REGISTRY, STARTUP_SECONDS
+from event_bus import EventBus, format_sse
+from price_alerts import POSITION_KINDS, AlertEngine
+from ledger_io import detect_format, export_transactions, import_transactions, read_rows
+from http_cache import COMPRESSIBLE_TYPES, IMMUTABLE_MAX_AGE, MIN_COMPRESS_BYTES, CompressedAssets, StaticFingerprints, compress, pick_encoding, revision_etag
+from investment_manager import add_investment, remove_investment, update_investment, add_transaction, new_position, stored_view
 from datetime import datetime
-from dateutil.parser import parse
-import webbrowser
+from functools import partial
+import atexit
 import logging
+import queue
 import subprocess
-import sys
-import os
+import time
+import zlib
+import urllib.request
+from threading import Thread
+
+PROCESS_STARTED = time.perf_counter()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_url_path='/static', static_folder='static', template_folder='templates')
 
-PRESET_CASES = [
-    ("Fever Case", "March 31, 2025"),
-    ("Gallery Case", "October 2, 2024"),
-    ("Kilowatt Case", "February 6, 2024"),
-    ("Revolution Case", "February 9, 2023"),
-    ("Recoil Case", "July 1, 2022"),
-    ("Dreams & Nightmares Case", "January 20, 2022"),
-    ("Operation Riptide Case", "September 21, 2021"),
-    ("Snakebite Case", "May 3, 2021"),
-    ("Operation Broken Fang Case", "December 3, 2020"),
-    ("Fracture Case", "August 6, 2020"),
-    ("Prisma 2 Case", "March 31, 2020"),
-    ("CS20 Case", "October 18, 2019"),
-    ("Shattered Web Case", "November 18, 2019"),
-    ("Prisma Case", "March 13, 2019"),
-    ("Danger Zone Case", "December 6, 2018"),
-    ("Horizon Case", "August 2, 2018"),
-    ("Clutch Case", "February 15, 2018"),
-    ("Spectrum 2 Case", "September 14, 2017"),
-    ("Operation Hydra Case", "May 23, 2017"),
-    ("Spectrum Case", "March 15, 2017"),
-    ("Glove Case", "November 28, 2016"),
-    ("Gamma 2 Case", "August 18, 2016"),
-    ("Gamma Case", "June 15, 2016"),
-    ("Chroma 3 Case", "April 27, 2016"),
-    ("Operation Wildfire Case", "February 17, 2016"),
-    ("Revolver Case", "December 8, 2015"),
-    ("Shadow Case", "September 17, 2015"),
-    ("Falchion Case", "May 26, 2015"),
-    ("Chroma 2 Case", "April 15, 2015"),
-    ("Chroma Case", "January 8, 2015"),
-    ("Operation Vanguard Case", "November 11, 2014"),
-    ("Operation Breakout Case", "July 1, 2014"),
-    ("Huntsman Case", "May 1, 2014"),
-    ("Operation Phoenix Case", "February 20, 2014"),
-    ("CSGO Weapon Case 3", "February 12, 2014"),
-    ("Winter Offensive Case", "December 18, 2013"),
-    ("Operation Bravo Case", "September 19, 2013"),
-    ("CSGO Weapon Case 2", "November 8, 2013"),
-    ("CSGO Weapon Case", "August 14, 2013")
-]
-
-PRESET_CASES.sort(key=lambda x: parse(x[1]), reverse=True)
-CASE_NAMES = [case[0] for case in PRESET_CASES]
-RELEASE_YEARS = {case[0]: parse(case[1]).year for case in PRESET_CASES}
-RELEASE_DATES = {case[0]: case[1] for case in PRESET_CASES}
+CASE_NAMES = CATALOG.names
+RELEASE_YEARS = CATALOG.release_years()
+RELEASE_DATES = CATALOG.release_dates()
 
+static_fingerprints = StaticFingerprints(app.static_folder)
+compressed_assets = CompressedAssets()
+
+# The price cache and alert rules are read here: both are small (well under a millisecond for
+# the full catalog and a hundred rules) and every read path needs the cache. Portfolios, whose
+# load grows with the ledger, and the price history are opened on first use.
 try:
     scraper = CSFloatScraper()
-    investments = load_investments()
-    logger.info("Scraper and investments loaded successfully")
+    event_bus = EventBus()
+    registry = PortfolioRegistry(scraper)
+    alerts = AlertEngine(scraper.history)
+    logger.info("Scraper loaded successfully")
 except Exception as e:
-    logger.error(f"Failed to initialize scraper or load investments: {e}")
+    logger.error(f"Failed to initialize scraper: {e}")
     raise
 
-@app.route('/')
-def index():
-    global investments
-    return render_template('index.html', investments=investments, case_names=CASE_NAMES, release_years=RELEASE_YEARS, release_dates=RELEASE_DATES, api_key_valid=scraper.config.get("is_valid", False))
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, route=route, status=response.status_code)
+    return response
+
+@app.after_request
+def cache_and_compress(response):
+    if request.endpoint == 'static':
+        if request.args.get('v'):
+            response.headers["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+    return compress_response(response)
+
+def compress_response(response):
+    if response.status_code != 200 or response.mimetype not in COMPRESSIBLE_TYPES or "Content-Encoding" in response.headers:
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = pick_encoding(request.headers.get("Accept-Encoding", ""))
+    if encoding is None:
+        return response
+    response.direct_passthrough = False
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return response
+    etag, weak = response.get_etag()
+    if request.endpoint == 'static' and etag:
+        body = compressed_assets.get((request.path, etag, encoding), data, encoding)
+    else:
+        body = compress(data, encoding)
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    if etag and not weak:
+        # The encoded body is no longer byte-identical to the file, so the validator is downgraded.
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        version = static_fingerprints.get(values['filename'])
+        if version:
+            values['v'] = version
+
+def not_modified(etag):
+    # Clients revalidate with If-None-Match; a match skips building and serializing the body.
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        return with_etag(response, etag)
+    return None
+
+def with_etag(response, etag):
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+def publish_price(name, info):
+    event_bus.publish("price", {"case": name, "price": info["price"] if info else None, "stale": info["stale"] if info else True})
+
+def publish_revision(portfolio_id, revision):
+    event_bus.publish("portfolio", {"portfolio": portfolio_id, "revision": revision})
+
+# The cache is flushed by each refresh that changes it; this covers anything left at shutdown.
+atexit.register(scraper.close)
+atexit.register(registry.close)
+
+def position_for(portfolio_id, case):
+    # Runs on every price update, so only portfolios already in memory are consulted; None
+    # makes the alert engine skip the rule until its portfolio is loaded again.
+    handle = registry.peek(portfolio_id)
+    if handle is None:
+        return None
+    with handle.portfolio.lock:
+        index = handle.portfolio.find(case)
+        if index is None:
+            return new_position(handle.portfolio.cost_basis)
+        return dict(handle.portfolio.investments[index]["position"])
+
+def notify_alert(alert):
+    event_bus.publish("alert", alert)
+    # Optional local hook, e.g. "alert_command": ["notify-send", "Case Collector"]; the alert
+    # message is passed as the last argument.
+    command = scraper.config.get("alert_command")
+    if command:
+        try:
+            subprocess.Popen([*command, alert["message"]])
+        except OSError as e:
+            logger.error(f"Alert command failed: {e}")
+
+scraper.price_listeners.append(publish_price)
+scraper.price_listeners.append(alerts.on_price)
+registry.on_revision = publish_revision
+alerts.position_for = position_for
+alerts.listeners.append(notify_alert)
+
+def portfolio_route(rule, **options):
+    # Registers a view under its original URL (the default portfolio) and again under
+    # /portfolios/<portfolio_id>, so every portfolio-facing route has an id-scoped twin.
+    def decorator(view):
+        app.route(rule, **options)(view)
+        app.route(f"/portfolios/<portfolio_id>{rule}", endpoint=f"{view.__name__}_scoped", **options)(view)
+        return view
+    return decorator
+
+def load_portfolio(portfolio_id):
+    try:
+        handle = registry.get(portfolio_id)
+    except ValueError as e:
+        abort(make_response(jsonify({"status": "error", "message": str(e)}), 400))
+    if handle is None:
+        abort(make_response(jsonify({"status": "error", "message": f"Unknown portfolio: {portfolio_id}"}), 404))
+    return handle
+
+def api_base(portfolio_id):
+    return "" if portfolio_id == DEFAULT_PORTFOLIO_ID else f"/portfolios/{portfolio_id}"
+
+@app.route('/portfolios', methods=['GET'])
+def list_portfolios():
+    return jsonify({"status": "success", "portfolios": registry.ids()})
+
+@app.route('/portfolios', methods=['POST'])
+def create_portfolio():
+    data = request.get_json(silent=True) or request.form
+    portfolio_id = data.get('id', '')
+    try:
+        handle = registry.create(portfolio_id)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if handle is None:
+        return jsonify({"status": "error", "message": f"Portfolio {portfolio_id} already exists"}), 409
+    return jsonify({"status": "success", "id": handle.id, "url": api_base(handle.id) + "/"}), 201
+
+@portfolio_route('/events', methods=['GET'])
+def events(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    portfolio = load_portfolio(portfolio_id).portfolio
+    subscriber = event_bus.subscribe()
+
+    def stream():
+        try:
+            yield format_sse("hello", {"portfolio": portfolio_id, "revision": portfolio.revision})
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if event == "portfolio" and data["portfolio"] != portfolio_id:
+                    continue
+                yield format_sse(event, data)
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@portfolio_route('/portfolio', methods=['GET'])
+def get_portfolio(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    handle = load_portfolio(portfolio_id)
+    etag = revision_etag("portfolio", handle.id, handle.generation, handle.portfolio.revision, request.headers.get('X-Portfolio-Revision', ''))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    response = with_etag(portfolio_response(handle.portfolio), etag)
+    response.vary.add("X-Portfolio-Revision")
+    return response
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify({"status": "ok"})
+
+@app.route('/startup_metrics', methods=['POST'])
+def startup_metrics():
+    data = request.get_json(silent=True) or {}
+    first_paint = data.get('first_paint_ms')
+    if first_paint is not None:
+        STARTUP_SECONDS.observe(float(first_paint) / 1000, phase="first_paint")
+        logger.info(f"Startup: first paint {float(first_paint):.0f}ms after navigation start")
+    return jsonify({"status": "success"})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+@portfolio_route('/')
+def index(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    handle = load_portfolio(portfolio_id)
+    portfolio = handle.portfolio
+    api_key_valid = scraper.config.get("is_valid", False)
+    etag = revision_etag("index", handle.id, handle.generation, portfolio.revision, api_key_valid, static_fingerprints.get('script.js'), static_fingerprints.get('style.css'))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    with portfolio.lock:
+        html = render_template('index.html', investments=stored_view(portfolio.investments), revision=portfolio.revision, portfolio_id=handle.id, api_base=api_base(handle.id), case_names=CASE_NAMES, release_years=RELEASE_YEARS, release_dates=RELEASE_DATES, image_versions=static_fingerprints.versions('images'), api_key_valid=api_key_valid)
+    return with_etag(Response(html, mimetype="text/html"), etag)
+
+def portfolio_response(portfolio):
+    # Clients send the revision they last saw; answer with only what changed since then
+    # and fall back to the full list when their revision is no longer in the change log.
+    revision = request.headers.get('X-Portfolio-Revision', type=int)
+    with portfolio.lock:
+        diff = portfolio.diff_since(revision)
+        if diff is None:
+            return jsonify({"status": "success", "revision": portfolio.revision, "investments": stored_view(portfolio.investments)})
+        return jsonify({"status": "success", "revision": portfolio.revision, "changes": diff})
 
 @app.route('/set_api_key', methods=['POST'])
 def set_api_key():
@@ -82,103 +267,310 @@ def set_api_key():
         return jsonify({"status": "success", "message": "API key validated and saved"})
     return jsonify({"status": "error", "message": "Invalid API key, please try again"})
 
-@app.route('/add_case', methods=['POST'])
-def add_case():
-    global investments
+@portfolio_route('/add_case', methods=['POST'])
+def add_case(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    portfolio = load_portfolio(portfolio_id).portfolio
+    investments = portfolio.investments
     case = request.form.get('case')
     qty = int(request.form.get('qty', 1))
     price = float(request.form.get('price', 0.0))
-    if not any(inv["item_name"] == case for inv in investments):
-        new_inv = {
-            "item_name": case,
-            "quantity": qty,
-            "purchase_price": price,
-            "purchase_date": datetime.now().strftime("%Y-%m-%d"),
-            "lowest_price": scraper.get_price(case),
-            "last_updated": "",
-            "transactions": [{"type": "buy", "quantity": qty, "price_per_case": price, "total": qty * price, "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}],
-            "total_sold_value": 0.0
-        }
-        add_investment(investments, new_inv)
-    return jsonify({"status": "success", "investments": investments})
-
-@app.route('/remove_case', methods=['POST'])
-def remove_case():
-    global investments
+    with portfolio.lock:
+        if case in CATALOG and portfolio.find(case) is None:
+            new_inv = {
+                "item_name": case,
+                "quantity": qty,
+                "purchase_price": price,
+                "purchase_date": datetime.now().strftime("%Y-%m-%d"),
+                "lowest_price": scraper.get_price(case, allow_stale=True),
+                "last_updated": "",
+                "transactions": [{"type": "buy", "quantity": qty, "price_per_case": price, "total": qty * price, "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}],
+                "total_sold_value": 0.0
+            }
+            add_investment(investments, new_inv, cost_basis=portfolio.cost_basis, storage=portfolio.storage)
+            portfolio.record(changed=[case], reordered=True)
+        return portfolio_response(portfolio)
+
+@portfolio_route('/remove_case', methods=['POST'])
+def remove_case(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    portfolio = load_portfolio(portfolio_id).portfolio
+    investments = portfolio.investments
     index = int(request.form.get('index'))
-    remove_investment(investments, index)
-    return jsonify({"status": "success", "investments": investments})
+    with portfolio.lock:
+        if 0 <= index < len(investments):
+            name = investments[index]["item_name"]
+            remove_investment(investments, index, storage=portfolio.storage)
+            portfolio.record(removed=[name], reordered=True)
+        return portfolio_response(portfolio)
 
-@app.route('/update_investment', methods=['POST'])
-def update_investment_route():
-    global investments
+@portfolio_route('/update_investment', methods=['POST'])
+def update_investment_route(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    portfolio = load_portfolio(portfolio_id).portfolio
+    investments = portfolio.investments
     data = request.get_json()
     index = int(data['index'])
     field = data['field']
     value = data['value']
-    update_investment(investments, index, field, value)
-    return jsonify({"status": "success", "investments": investments})
+    with portfolio.lock:
+        update_investment(investments, index, field, value, storage=portfolio.storage)
+        if 0 <= index < len(investments):
+            portfolio.record(changed=[investments[index]["item_name"]])
+        return portfolio_response(portfolio)
 
-@app.route('/add_transaction', methods=['POST'])
-def add_transaction_route():
-    global investments
+@portfolio_route('/add_transaction', methods=['POST'])
+def add_transaction_route(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    portfolio = load_portfolio(portfolio_id).portfolio
+    investments = portfolio.investments
     data = request.get_json()
-    index = int(data['index'])
-    transaction_type = data['type']
-    qty = int(data['quantity'])
-    price = float(data['price'])
-    add_transaction(investments, index, transaction_type, qty, price)
-    return jsonify({"status": "success", "investments": investments})
-
-@app.route('/refresh_prices', methods=['POST'])
-def refresh_prices():
-    global investments
-    if scraper.fetch_prices(CASE_NAMES):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        # Update invested cases
-        for inv in investments:
-            price = scraper.get_price(inv["item_name"])
-            if price is not None:
-                inv["lowest_price"] = price
-            else:
-                inv["lowest_price"] = None
-            inv["last_updated"] = now
-
-        save_investments(investments)
-        scraper.append_price_history(CASE_NAMES)
-
-        return jsonify({
+    try:
+        index = int(data['index'])
+        transaction_type = data['type']
+        qty = int(data['quantity'])
+        price = float(data['price'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"status": "error", "message": "index, type, quantity and price are required numbers"}), 400
+    with portfolio.lock:
+        try:
+            add_transaction(investments, index, transaction_type, qty, price, storage=portfolio.storage)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        if 0 <= index < len(investments):
+            portfolio.record(changed=[investments[index]["item_name"]])
+        return portfolio_response(portfolio)
+
+@portfolio_route('/portfolio/cost_basis', methods=['POST'])
+def set_cost_basis(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    handle = load_portfolio(portfolio_id)
+    data = request.get_json()
+    try:
+        handle.portfolio.set_cost_basis(data.get('method'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    registry.save_cost_basis(handle.id, handle.portfolio.cost_basis)
+    return portfolio_response(handle.portfolio)
+
+@portfolio_route('/portfolio/summary', methods=['GET'])
+def portfolio_summary(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    handle = load_portfolio(portfolio_id)
+    portfolio = handle.portfolio
+    etag = revision_etag("summary", handle.id, handle.generation, portfolio.revision, scraper.history.revision)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    with portfolio.lock:
+        return with_etag(jsonify({"status": "success", "revision": portfolio.revision, **handle.analytics.summary()}), etag)
+
+@portfolio_route('/portfolio/timeseries', methods=['GET'])
+def portfolio_timeseries(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    handle = load_portfolio(portfolio_id)
+    portfolio = handle.portfolio
+    cases = [case.strip() for case in request.args.get('cases', '').split(',') if case.strip()]
+    # The open bucket moves with the calendar, so the date is part of the key.
+    etag = revision_etag("timeseries", handle.id, handle.generation, portfolio.revision, scraper.history.revision, datetime.now().strftime("%Y-%m-%d"), request.query_string.decode())
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    try:
+        with portfolio.lock:
+            result = handle.analytics.timeseries(cases, bucket=request.args.get('bucket', 'day'), start=request.args.get('start'), end=request.args.get('end'))
+            revision = portfolio.revision
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return with_etag(jsonify({"status": "success", "revision": revision, **result}), etag)
+
+def apply_refreshed_prices(job):
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # One fetch serves every loaded portfolio; the rest pick the prices up from the cache
+    # when they are next loaded. Cases that could not be refetched keep their last price.
+    for handle in registry.loaded_portfolios():
+        portfolio = handle.portfolio
+        with portfolio.lock:
+            for inv in portfolio.investments:
+                inv["lowest_price"] = scraper.get_price(inv["item_name"], allow_stale=True)
+                inv["last_updated"] = now
+            portfolio.record(changed=[inv["item_name"] for inv in portfolio.investments])
+
+            # Prices are re-derivable from the cache, so these writes can be coalesced.
+            portfolio.storage.save(portfolio.investments, durable=False)
+    scraper.append_price_history(job["cases"])
+
+price_refresher = PriceRefresher(
+    scraper,
+    CASE_NAMES,
+    on_refresh=apply_refreshed_prices,
+    interval=int(scraper.config.get("refresh_interval_minutes", 15)) * 60
+)
+
+@portfolio_route('/prices', methods=['GET'])
+def get_prices(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    handle = load_portfolio(portfolio_id)
+    portfolio = handle.portfolio
+    all_prices = {}
+    market = {}
+    stale = []
+    for name in CASE_NAMES:
+        info = scraper.get_price_info(name)
+        all_prices[name] = info["price"] if info else None
+        if info is not None:
+            market[name] = {"listings_seen": info["listings_seen"], "spread": info["spread"]}
+        if info is None or info["stale"]:
+            stale.append(name)
+    refreshing = price_refresher.is_refreshing()
+    # Staleness drifts with the clock rather than a revision, so the stale set is hashed in.
+    etag = revision_etag("prices", handle.id, handle.generation, portfolio.revision, scraper.price_revision, refreshing, zlib.crc32("|".join(stale).encode()))
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    with portfolio.lock:
+        return with_etag(jsonify({
             "status": "success",
-            "investments": investments,
-            "all_prices": {name: scraper.get_price(name) for name in CASE_NAMES}
-        })
-    return jsonify({"status": "error", "message": "Failed to refresh prices"})
-
-@app.route('/reorder_investments', methods=['POST'])
-def reorder_investments():
-    global investments
+            "investments": stored_view(portfolio.investments),
+            "revision": portfolio.revision,
+            "all_prices": all_prices,
+            "market": market,
+            "stale": stale,
+            "refreshing": refreshing
+        }), etag)
+
+@portfolio_route('/refresh_prices', methods=['POST'])
+def refresh_prices(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    options = request.get_json(silent=True) or request.form
+    scope = options.get('scope', 'all')
+    force = str(options.get('force', 'false')).lower() in ('1', 'true', 'yes')
+    if scope == 'holdings':
+        portfolio = load_portfolio(portfolio_id).portfolio
+        with portfolio.lock:
+            names = [inv["item_name"] for inv in portfolio.investments]
+    else:
+        names = CASE_NAMES
+    job = price_refresher.kick(names, force=force)
+    return jsonify({"status": "accepted", "job_id": job["id"], "job": job}), 202
+
+@app.route('/refresh_status/<job_id>', methods=['GET'])
+def refresh_status(job_id):
+    job = price_refresher.get_job(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown refresh job"}), 404
+    return jsonify({"status": "success", "job": job})
+
+@portfolio_route('/reorder_investments', methods=['POST'])
+def reorder_investments(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    portfolio = load_portfolio(portfolio_id).portfolio
+    investments = portfolio.investments
     data = request.get_json()
-    new_investments = data.get('investments', [])
-    if len(new_investments) == len(investments):
-        investments = new_investments
-        save_investments(investments)
-        return jsonify({"status": "success", "investments": investments})
+    order = data.get('order')
+    if order is None:
+        order = [inv.get("item_name") for inv in data.get('investments', [])]
+    with portfolio.lock:
+        by_name = {inv["item_name"]: inv for inv in investments}
+        if len(order) == len(investments) and set(order) == set(by_name):
+            # Reorder the server's own records in place rather than trusting client copies.
+            investments[:] = [by_name[name] for name in order]
+            portfolio.storage.save(investments)
+            portfolio.record(reordered=True)
+            return portfolio_response(portfolio)
     return jsonify({"status": "error", "message": "Invalid investments data"})
 
-@app.teardown_appcontext
-def close_scraper(exception=None):
-    scraper.close()
+@portfolio_route('/import', methods=['POST'])
+def import_ledger(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    portfolio = load_portfolio(portfolio_id).portfolio
+    try:
+        fmt = detect_format(request.args.get('format'), request.content_type)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    dry_run = request.args.get('dry_run', 'false').lower() in ('1', 'true', 'yes')
+    result = import_transactions(portfolio, read_rows(request.stream, fmt), dry_run=dry_run,
+                                 price_for=partial(scraper.get_price, allow_stale=True))
+    return jsonify({"status": "success", "dry_run": dry_run, "revision": portfolio.revision, **result})
 
-import webview
-from threading import Thread
-import time
+@portfolio_route('/export', methods=['GET'])
+def export_ledger(portfolio_id=DEFAULT_PORTFOLIO_ID):
+    portfolio = load_portfolio(portfolio_id).portfolio
+    try:
+        fmt = detect_format(request.args.get('format', 'csv'), None)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    return Response(export_transactions(portfolio, fmt), mimetype=mimetype, headers={"Content-Disposition": f"attachment; filename={portfolio_id}-transactions.{fmt}"})
+
+@app.route('/alerts', methods=['GET'])
+def list_alerts():
+    return jsonify({"status": "success", "rules": alerts.list_rules()})
+
+@app.route('/alerts', methods=['POST'])
+def create_alert():
+    data = request.get_json(silent=True) or request.form
+    # JSON bodies can carry any type; coerce so bad input is a 400 from validation, not a 500.
+    kind = str(data.get('kind') or '')
+    case = str(data.get('case') or '')
+    portfolio_id = str(data.get('portfolio') or DEFAULT_PORTFOLIO_ID)
+    try:
+        if kind in POSITION_KINDS and registry.get(portfolio_id) is None:
+            raise ValueError(f"Unknown portfolio: {portfolio_id}")
+        rule = alerts.add_rule(case, kind, data.get('threshold'), portfolio=portfolio_id)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    # Check the new rule against the cached price straight away rather than waiting for a refresh.
+    alerts.on_price(rule["case"], scraper.get_price_info(rule["case"]))
+    return jsonify({"status": "success", "rule": rule}), 201
+
+@app.route('/alerts/<rule_id>', methods=['DELETE'])
+def delete_alert(rule_id):
+    if not alerts.remove_rule(rule_id):
+        return jsonify({"status": "error", "message": "Unknown alert rule"}), 404
+    return jsonify({"status": "success"})
+
+@app.route('/alerts/triggered', methods=['GET'])
+def triggered_alerts():
+    triggered, last = alerts.triggered_since(request.args.get('since', 0, type=int))
+    return jsonify({"status": "success", "alerts": triggered, "last": last})
+
+@app.route('/price_history', methods=['GET'])
+def get_price_history():
+    if any(key in request.args for key in ('cases', 'start', 'end', 'bucket')):
+        return get_price_history_series()
+
+    etag = revision_etag("history", scraper.history.revision, scraper.price_revision)
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    prices = {}
+    latest = scraper.history.latest_prices()
+    columns = scraper.price_columns.as_dict()
+
+    for case in CASE_NAMES:
+        if case in latest:
+            prices[case] = latest[case]
+        elif columns[case] is not None:
+            prices[case] = columns[case]
+        else:
+            prices[case] = 0.0
+
+    return with_etag(jsonify({"status": "success", "prices": prices}), etag)
+
+def get_price_history_series():
+    cases = [case.strip() for case in request.args.get('cases', '').split(',') if case.strip()] or CASE_NAMES
+    unknown = [case for case in cases if case not in CATALOG]
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown case(s): {', '.join(unknown)}"}), 400
+    bucket = request.args.get('bucket', 'day')
+    etag = revision_etag("history", scraper.history.revision, datetime.now().strftime("%Y-%m-%d"), request.query_string.decode())
+    cached = not_modified(etag)
+    if cached is not None:
+        return cached
+    try:
+        series = scraper.history.aggregate(cases, bucket=bucket, start=request.args.get('start'), end=request.args.get('end'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return with_etag(jsonify({"status": "success", "bucket": bucket, "series": series}), etag)
 
 class WindowAPI:
     def minimize(self):
+        import webview
         webview.windows[0].minimize()
 
     def toggle_maximize(self):
+        import webview
         window = webview.windows[0]
         if window.width == window.screen.width and window.height == window.screen.height:
             window.restore()
@@ -186,16 +578,45 @@ class WindowAPI:
             window.toggle_fullscreen()
 
     def close(self):
+        import webview
         webview.windows[0].destroy()
 
+def warm_default_portfolio():
+    # Loads the default portfolio while the window is being created, so the first page
+    # request usually finds it in memory instead of reading it on the paint path.
+    try:
+        registry.get(DEFAULT_PORTFOLIO_ID)
+    except Exception as e:
+        logger.error(f"Failed to load the default portfolio: {e}")
+
 def start_flask():
-    from app import app
+    price_refresher.start()
+    Thread(target=warm_default_portfolio, name="portfolio-warmup", daemon=True).start()
     app.run(host='127.0.0.1', port=5000, debug=False, use_reloader=False)
 
+def wait_until_ready(url, timeout=10.0, interval=0.025):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=interval * 10) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(interval)
+    return False
+
 if __name__ == '__main__':
     flask_thread = Thread(target=start_flask, daemon=True)
     flask_thread.start()
-    time.sleep(1)
+    if not wait_until_ready("http://127.0.0.1:5000/healthz"):
+        logger.warning("Flask did not answer the readiness probe in time, opening the window anyway")
+    ready = time.perf_counter() - PROCESS_STARTED
+    STARTUP_SECONDS.observe(ready, phase="server_ready")
+    logger.info(f"Startup: server ready {ready * 1000:.0f}ms after launch")
+
+    # pywebview is only needed for the desktop window, so it is imported after the server is up.
+    import webview
     webview.create_window(
         "Case Collector",
         "http://127.0.0.1:5000",
@@ -206,25 +627,3 @@ if __name__ == '__main__':
         js_api=WindowAPI()
     )
     webview.start()
-
-@app.route('/price_history', methods=['GET'])
-def get_price_history():
-    prices = {}
-    history = {}
-
-    if os.path.exists("price_history.json"):
-        try:
-            with open("price_history.json", "r") as f:
-                history = json.load(f)
-        except Exception as e:
-            logger.warning(f"Failed to read price history: {e}")
-
-    for case in CASE_NAMES:
-        if case in history and history[case]:
-            prices[case] = history[case][-1]["price"]
-        elif case in scraper.price_cache:
-            prices[case] = scraper.price_cache[case]["price"]
-        else:
-            prices[case] = 0.0
-
-    return jsonify({"status": "success", "prices": prices})
\ No newline at end of file
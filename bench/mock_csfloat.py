@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import CATALOG
+
+
+class MockSettings:
+    def __init__(self, latency_ms=50.0, jitter_ms=10.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=1,
+                 depth=120, max_page_size=50, seed=1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.depth = depth
+        self.max_page_size = max_page_size
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "listings_requests": 0, "rate_limited": 0, "errors": 0, "bytes": 0}
+
+    def roll(self):
+        with self.lock:
+            return self.random.random()
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats)
+
+    def reset(self):
+        with self.lock:
+            for key in self.stats:
+                self.stats[key] = 0
+
+
+def listings_for(def_index, depth):
+    # Deterministic, ascending prices per case so the lowest listing is stable across runs.
+    case = CATALOG.from_def_index(def_index)
+    name = case.name if case is not None else f"Unknown {def_index}"
+    base = 25 + (def_index * 7919) % 2000
+    return [
+        {
+            "id": f"{def_index}-{i}",
+            "price": base + i * (1 + def_index % 3),
+            "item": {"def_index": def_index, "market_hash_name": name}
+        }
+        for i in range(depth)
+    ]
+
+
+def make_handler(settings):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+            settings.count("bytes", len(body))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/__stats":
+                return self._send(200, settings.snapshot())
+            if url.path == "/__reset":
+                settings.reset()
+                return self._send(200, {"status": "reset"})
+            if url.path != "/api/v1/listings":
+                return self._send(404, {"message": "not found"})
+
+            settings.count("requests")
+            settings.count("listings_requests")
+            delay = max(0.0, settings.latency_ms + settings.random.uniform(-settings.jitter_ms, settings.jitter_ms))
+            time.sleep(delay / 1000)
+
+            if settings.roll() < settings.rate_limit_rate:
+                settings.count("rate_limited")
+                return self._send(429, {"message": "too many requests"}, {"Retry-After": str(settings.retry_after)})
+            if settings.roll() < settings.error_rate:
+                settings.count("errors")
+                return self._send(500, {"message": "internal error"})
+
+            params = parse_qs(url.query)
+            limit = min(int(params.get("limit", ["50"])[0]), settings.max_page_size)
+            page = int(params.get("cursor", params.get("page", ["0"]))[0])
+            def_indexes = [int(value) for raw in params.get("def_index", []) for value in raw.split(",") if value]
+            listings = []
+            for def_index in def_indexes:
+                listings.extend(listings_for(def_index, settings.depth))
+            if params.get("sort_by", [""])[0] == "lowest_price":
+                listings.sort(key=lambda listing: listing["price"])
+            page_listings = listings[page * limit:(page + 1) * limit]
+            payload = {"data": page_listings}
+            if (page + 1) * limit < len(listings):
+                payload["cursor"] = str(page + 1)
+            return self._send(200, payload)
+
+    return Handler
+
+
+def start_server(settings, host="127.0.0.1", port=0):
+    server = ThreadingHTTPServer((host, port), make_handler(settings))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="mock-csfloat", daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stand-in for the CSFloat listings API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--depth", type=int, default=120)
+    parser.add_argument("--max-page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    settings = MockSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate,
+                            args.retry_after, args.depth, args.max_page_size)
+    server = start_server(settings, port=args.port)
+    print(f"Mock CSFloat API listening on http://127.0.0.1:{server.server_address[1]}/api/v1/listings")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
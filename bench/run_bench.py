@@ -0,0 +1,213 @@
+import argparse
+import atexit
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from mock_csfloat import MockSettings, start_server
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    return f"p50={percentile(samples, 50):8.2f}ms  p99={percentile(samples, 99):8.2f}ms  n={len(samples)}"
+
+
+def mock_call(base_url, path):
+    with urllib.request.urlopen(base_url + path) as response:
+        return json.load(response)
+
+
+def setup_workdir(api_url):
+    # Run against a throwaway directory so the user's cache, history and portfolio are never touched.
+    workdir = tempfile.mkdtemp(prefix="cs2cc-bench-")
+    shutil.copytree(os.path.join(ROOT_DIR, "static"), os.path.join(workdir, "static"))
+    shutil.copytree(os.path.join(ROOT_DIR, "templates"), os.path.join(workdir, "templates"))
+    with open(os.path.join(workdir, "config.json"), "w") as f:
+        json.dump({"api_key": "bench-key", "is_valid": True, "api_url": api_url, "refresh_interval_minutes": 1440}, f)
+    os.chdir(workdir)
+    return workdir
+
+
+def bench_scrape(scraper, base_url, case_names, iterations, report):
+    report("== Refresh (fetch_prices, forced) ==")
+    walls = []
+    for _ in range(iterations):
+        mock_call(base_url, "/__reset")
+        start = time.perf_counter()
+        ok = scraper.fetch_prices(case_names, only_stale=False)
+        walls.append((time.perf_counter() - start) * 1000)
+        stats = mock_call(base_url, "/__stats")
+        failed = sum(1 for status in scraper.fetch_status.values() if status["status"] == "error")
+        report(f"  wall={walls[-1]:9.2f}ms  ok={ok}  requests={stats['listings_requests']}  "
+               f"429s={stats['rate_limited']}  5xx={stats['errors']}  failed_cases={failed}  bytes={stats['bytes']}")
+    report(f"  refresh wall time: {summarize(walls)}")
+
+
+def time_requests(send, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = send()
+        samples.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            raise RuntimeError(f"Request failed with {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return samples
+
+
+def reset_portfolio(app_module, size, ledger):
+    import investment_manager
+
+    portfolio = app_module.registry.get(app_module.DEFAULT_PORTFOLIO_ID).portfolio
+    investments = portfolio.investments
+    investments.clear()
+    for name in app_module.CASE_NAMES[:size]:
+        new_inv = {
+            "item_name": name,
+            "quantity": 0,
+            "purchase_price": 0.0,
+            "purchase_date": datetime.now().strftime("%Y-%m-%d"),
+            "lowest_price": None,
+            "last_updated": "",
+            "transactions": [],
+            "total_sold_value": 0.0
+        }
+        investment_manager.add_investment(investments, new_inv, durable=False, cost_basis=portfolio.cost_basis, storage=portfolio.storage)
+        index = len(investments) - 1
+        for i in range(ledger):
+            investment_manager.add_transaction(investments, index, "buy", 1, 1.0 + (i % 7) / 10, durable=False, storage=portfolio.storage)
+    investment_manager.flush_investments(portfolio.storage)
+    portfolio.record(changed=[inv["item_name"] for inv in investments], reordered=True)
+    return portfolio
+
+
+def seed_history(history, case_names, days, seeded):
+    today = datetime.now()
+    for offset in range(seeded, days):
+        date = (today - timedelta(days=offset)).strftime("%Y-%m-%d")
+        history.append({name: 1.0 + (offset % 50) / 100 for name in case_names}, date=date)
+    return max(seeded, days)
+
+
+def bench_routes(app_module, iterations, portfolio_sizes, ledger_sizes, history_days, report):
+    client = app_module.app.test_client()
+
+    report("== POST /refresh_prices (forced, kick + time to job completion) ==")
+    kick, complete = [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.post("/refresh_prices", json={"scope": "all", "force": True})
+        kick.append((time.perf_counter() - start) * 1000)
+        job_id = response.get_json()["job_id"]
+        while client.get(f"/refresh_status/{job_id}").get_json()["job"]["status"] in ("queued", "running"):
+            time.sleep(0.005)
+        complete.append((time.perf_counter() - start) * 1000)
+    report(f"  kick:       {summarize(kick)}")
+    report(f"  completion: {summarize(complete)}")
+
+    report("== POST /add_transaction ==")
+    for size in portfolio_sizes:
+        for ledger in ledger_sizes:
+            revision = reset_portfolio(app_module, size, ledger).revision
+            samples = time_requests(lambda: client.post(
+                "/add_transaction",
+                json={"index": size - 1, "type": "buy", "quantity": 1, "price": 1.5},
+                headers={"X-Portfolio-Revision": str(revision)}
+            ), iterations)
+            report(f"  cases={size:3d} ledger={ledger:6d}  {summarize(samples)}")
+
+    report("== GET /price_history ==")
+    seeded = 0
+    for days in history_days:
+        seeded = seed_history(app_module.scraper.history, app_module.CASE_NAMES, days, seeded)
+        latest = time_requests(lambda: client.get("/price_history"), iterations)
+        weekly = time_requests(lambda: client.get("/price_history?bucket=week"), iterations)
+        report(f"  days={days:5d}  latest  {summarize(latest)}")
+        report(f"  days={days:5d}  weekly  {summarize(weekly)}")
+
+
+def shutdown_app(app_module):
+    import investment_manager
+
+    # The app registers atexit hooks that save into the current directory. Run them now, while
+    # still inside the workdir, and unregister them so nothing is written into the checkout
+    # once main() changes back to ROOT_DIR.
+    app_module.price_refresher.stop()
+    app_module.scraper.close()
+    app_module.registry.close()
+    investment_manager.flush_investments()
+    atexit.unregister(app_module.scraper.close)
+    atexit.unregister(app_module.registry.close)
+    atexit.unregister(investment_manager.flush_investments)
+
+
+def parse_sizes(value):
+    return [int(part) for part in value.split(",") if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the price refresh path and Flask routes against a mock CSFloat API")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--refresh-iterations", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=80.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--portfolio-sizes", type=parse_sizes, default=[5, 39])
+    parser.add_argument("--ledger-sizes", type=parse_sizes, default=[10, 1000])
+    parser.add_argument("--history-days", type=parse_sizes, default=[30, 365, 1825])
+    parser.add_argument("--output", help="Also write the report to this file")
+    args = parser.parse_args()
+
+    settings = MockSettings(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_rate, args.retry_after)
+    server = start_server(settings)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = setup_workdir(base_url + "/api/v1/listings")
+
+    lines = []
+
+    def report(line):
+        print(line)
+        lines.append(line)
+
+    logging.disable(logging.INFO)
+    app_module = None
+    try:
+        import app as app_module
+
+        report(f"Mock latency {args.latency_ms}ms +/- {args.jitter_ms}ms, error rate {args.error_rate}, 429 rate {args.rate_limit_rate}")
+        bench_scrape(app_module.scraper, base_url, app_module.CASE_NAMES, args.refresh_iterations, report)
+        app_module.price_refresher.start()
+        bench_routes(app_module, args.iterations, args.portfolio_sizes, args.ledger_sizes, args.history_days, report)
+    finally:
+        if app_module is not None:
+            shutdown_app(app_module)
+        server.shutdown()
+        os.chdir(ROOT_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if output:
+        with open(output, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+    main()
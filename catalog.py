@@ -0,0 +1,132 @@
+import math
+from array import array
+from dataclasses import dataclass
+from datetime import date
+
+
+@dataclass(frozen=True, slots=True)
+class CaseInfo:
+    name: str
+    def_index: int
+    released: date
+
+    @property
+    def release_year(self):
+        return self.released.year
+
+    @property
+    def release_date(self):
+        return f"{self.released:%B} {self.released.day}, {self.released.year}"
+
+
+class CaseCatalog:
+    __slots__ = ("cases", "positions", "by_def_index")
+
+    def __init__(self, cases):
+        self.cases = tuple(sorted(cases, key=lambda case: case.released, reverse=True))
+        self.positions = {case.name: i for i, case in enumerate(self.cases)}
+        self.by_def_index = {case.def_index: case for case in self.cases}
+
+    def __len__(self):
+        return len(self.cases)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def get(self, name):
+        position = self.positions.get(name)
+        return self.cases[position] if position is not None else None
+
+    def position(self, name):
+        return self.positions.get(name)
+
+    def from_def_index(self, def_index):
+        return self.by_def_index.get(def_index)
+
+    @property
+    def names(self):
+        return [case.name for case in self.cases]
+
+    def def_indexes(self):
+        return {case.name: case.def_index for case in self.cases}
+
+    def release_years(self):
+        return {case.name: case.release_year for case in self.cases}
+
+    def release_dates(self):
+        return {case.name: case.release_date for case in self.cases}
+
+
+class PriceColumns:
+    # Latest price and fetch time per catalog position in two flat double arrays; NaN marks
+    # a case with no known price.
+    __slots__ = ("catalog", "prices", "timestamps")
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.prices = array("d", [math.nan]) * len(catalog)
+        self.timestamps = array("d", [math.nan]) * len(catalog)
+
+    def set(self, name, price, timestamp):
+        position = self.catalog.position(name)
+        if position is not None:
+            self.prices[position] = price
+            self.timestamps[position] = timestamp.timestamp()
+
+    def clear(self, name):
+        position = self.catalog.position(name)
+        if position is not None:
+            self.prices[position] = math.nan
+            self.timestamps[position] = math.nan
+
+    def get(self, name):
+        position = self.catalog.position(name)
+        if position is None or math.isnan(self.prices[position]):
+            return None
+        return self.prices[position]
+
+    def as_dict(self):
+        return {case.name: (None if math.isnan(price) else price) for case, price in zip(self.catalog.cases, self.prices)}
+
+
+CATALOG = CaseCatalog([
+    CaseInfo("Fever Case", 7007, date(2025, 3, 31)),
+    CaseInfo("Gallery Case", 7003, date(2024, 10, 2)),
+    CaseInfo("Kilowatt Case", 4904, date(2024, 2, 6)),
+    CaseInfo("Revolution Case", 4880, date(2023, 2, 9)),
+    CaseInfo("Recoil Case", 4846, date(2022, 7, 1)),
+    CaseInfo("Dreams & Nightmares Case", 4818, date(2022, 1, 20)),
+    CaseInfo("Operation Riptide Case", 4790, date(2021, 9, 21)),
+    CaseInfo("Snakebite Case", 4747, date(2021, 5, 3)),
+    CaseInfo("Operation Broken Fang Case", 4717, date(2020, 12, 3)),
+    CaseInfo("Fracture Case", 4698, date(2020, 8, 6)),
+    CaseInfo("Prisma 2 Case", 4695, date(2020, 3, 31)),
+    CaseInfo("CS20 Case", 4669, date(2019, 10, 18)),
+    CaseInfo("Shattered Web Case", 4620, date(2019, 11, 18)),
+    CaseInfo("Prisma Case", 4598, date(2019, 3, 13)),
+    CaseInfo("Danger Zone Case", 4548, date(2018, 12, 6)),
+    CaseInfo("Horizon Case", 4482, date(2018, 8, 2)),
+    CaseInfo("Clutch Case", 4471, date(2018, 2, 15)),
+    CaseInfo("Spectrum 2 Case", 4403, date(2017, 9, 14)),
+    CaseInfo("Operation Hydra Case", 4352, date(2017, 5, 23)),
+    CaseInfo("Spectrum Case", 4351, date(2017, 3, 15)),
+    CaseInfo("Glove Case", 4288, date(2016, 11, 28)),
+    CaseInfo("Gamma 2 Case", 4281, date(2016, 8, 18)),
+    CaseInfo("Gamma Case", 4236, date(2016, 6, 15)),
+    CaseInfo("Chroma 3 Case", 4233, date(2016, 4, 27)),
+    CaseInfo("Operation Wildfire Case", 4187, date(2016, 2, 17)),
+    CaseInfo("Revolver Case", 4186, date(2015, 12, 8)),
+    CaseInfo("Shadow Case", 4138, date(2015, 9, 17)),
+    CaseInfo("Falchion Case", 4091, date(2015, 5, 26)),
+    CaseInfo("Chroma 2 Case", 4089, date(2015, 4, 15)),
+    CaseInfo("Chroma Case", 4061, date(2015, 1, 8)),
+    CaseInfo("Operation Vanguard Case", 4029, date(2014, 11, 11)),
+    CaseInfo("Operation Breakout Case", 4018, date(2014, 7, 1)),
+    CaseInfo("Huntsman Case", 4017, date(2014, 5, 1)),
+    CaseInfo("Operation Phoenix Case", 4011, date(2014, 2, 20)),
+    CaseInfo("CSGO Weapon Case 3", 4010, date(2014, 2, 12)),
+    CaseInfo("Winter Offensive Case", 4009, date(2013, 12, 18)),
+    CaseInfo("Operation Bravo Case", 4003, date(2013, 9, 19)),
+    CaseInfo("CSGO Weapon Case 2", 4004, date(2013, 11, 8)),
+    CaseInfo("CSGO Weapon Case", 4001, date(2013, 8, 14))
+])
@@ -1,62 +1,108 @@
 import logging
 import json
 import os
-import requests
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
+from catalog import CATALOG, PriceColumns
+from metrics import FILE_IO_SECONDS, PRICE_CACHE_LOOKUPS, PRICE_REFRESH_SECONDS
+from price_history import PriceHistoryStore
 
 logger = logging.getLogger(__name__)
 
 PRICE_CACHE_FILE = "price_cache.json"
 CONFIG_FILE = "config.json"
+API_URL = "https://csfloat.com/api/v1/listings"
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_CACHE_EXPIRY = timedelta(hours=1)
+# Only the cheapest few listings are needed for price, listing count and spread.
+DEFAULT_PAGE_SIZE = 10
 
-ITEM_DEF_INDEX = {
-    "Fever Case": 7007,
-    "Gallery Case": 7003,
-    "Kilowatt Case": 4904,
-    "Revolution Case": 4880,
-    "Recoil Case": 4846,
-    "Dreams & Nightmares Case": 4818,
-    "Operation Riptide Case": 4790,
-    "Snakebite Case": 4747,
-    "Operation Broken Fang Case": 4717,
-    "Fracture Case": 4698,
-    "Prisma 2 Case": 4695,
-    "CS20 Case": 4669,
-    "Shattered Web Case": 4620,
-    "Prisma Case": 4598,
-    "Danger Zone Case": 4548,
-    "Horizon Case": 4482,
-    "Clutch Case": 4471,
-    "Spectrum 2 Case": 4403,
-    "Operation Hydra Case": 4352,
-    "Spectrum Case": 4351,
-    "Glove Case": 4288,
-    "Gamma 2 Case": 4281,
-    "Gamma Case": 4236,
-    "Chroma 3 Case": 4233,
-    "Operation Wildfire Case": 4187,
-    "Revolver Case": 4186,
-    "Shadow Case": 4138,
-    "Falchion Case": 4091,
-    "Chroma 2 Case": 4089,
-    "Chroma Case": 4061,
-    "Operation Vanguard Case": 4029,
-    "Operation Breakout Case": 4018,
-    "Huntsman Case": 4017,
-    "Operation Phoenix Case": 4011,
-    "CSGO Weapon Case 3": 4010,
-    "Winter Offensive Case": 4009,
-    "Operation Bravo Case": 4003,
-    "CSGO Weapon Case 2": 4004,
-    "CSGO Weapon Case": 4001
+# Per-case cache lifetimes in hours. Armory cases still move every day, while the old
+# rare-drop cases barely change between refreshes; anything not listed uses DEFAULT_CACHE_EXPIRY.
+# Individual entries can be overridden with "case_ttl_hours" in config.json.
+CASE_TTL_HOURS = {
+    "Fever Case": 0.5,
+    "Gallery Case": 0.5,
+    "Operation Vanguard Case": 6,
+    "Operation Breakout Case": 6,
+    "Huntsman Case": 6,
+    "Operation Phoenix Case": 6,
+    "CSGO Weapon Case 3": 6,
+    "Winter Offensive Case": 6,
+    "Operation Bravo Case": 6,
+    "CSGO Weapon Case 2": 6,
+    "CSGO Weapon Case": 6
 }
 
+ITEM_DEF_INDEX = CATALOG.def_indexes()
+
 class CSFloatScraper:
     def __init__(self):
         self.price_cache = self._load_cache()
-        self.CACHE_EXPIRY = timedelta(hours=1)
+        self.price_columns = PriceColumns(CATALOG)
+        for name, entry in self.price_cache.items():
+            self.price_columns.set(name, entry["price"], entry["timestamp"])
+        self.CACHE_EXPIRY = DEFAULT_CACHE_EXPIRY
         self.config = self._load_config()
+        self.case_ttls = self._load_case_ttls()
         self.api_key = self._load_api_key()
+        self.api_url = os.environ.get("CSFLOAT_API_URL") or self.config.get("api_url", API_URL)
+        self.max_workers = max(1, int(self.config.get("max_workers", DEFAULT_MAX_WORKERS)))
+        self.page_size = int(self.config.get("listing_page_size", DEFAULT_PAGE_SIZE))
+        self._session = None
+        self._scheduler = None
+        self._http_lock = threading.Lock()
+        # Guards price_cache/price_columns writes and the snapshot save_cache takes of them.
+        self.cache_lock = threading.Lock()
+        # Bumped on every cache write; read endpoints key their ETags on it.
+        self.price_revision = 0
+        self.config_lock = threading.Lock()
+        self.fetch_status = {}
+        self.history = PriceHistoryStore()
+        self.price_listeners = []
+
+    @property
+    def session(self):
+        # requests and the scheduler are only imported once the first call goes out, so
+        # launching the app with a warm cache never pays for them.
+        if self._session is None:
+            with self._http_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            session = self.session
+            with self._http_lock:
+                if self._scheduler is None:
+                    from request_scheduler import (RequestScheduler, DEFAULT_RATE, DEFAULT_BURST, DEFAULT_MAX_RETRIES,
+                                                   DEFAULT_THROTTLE_WINDOW)
+                    # Pacing stays on, but the default burst covers one refresh of the whole
+                    # catalog, so only back-to-back refreshes wait on the rate.
+                    self._scheduler = RequestScheduler(
+                        session,
+                        rate=float(self.config.get("requests_per_second", DEFAULT_RATE)),
+                        burst=int(self.config.get("request_burst", max(DEFAULT_BURST, len(CATALOG)))),
+                        max_retries=int(self.config.get("max_retries", DEFAULT_MAX_RETRIES)),
+                        throttle_window=self.config.get("throttle_window", DEFAULT_THROTTLE_WINDOW)
+                    )
+        return self._scheduler
+
+    def _create_session(self):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # One keep-alive pool shared by every worker so each refresh only pays for
+        # the TLS handshakes of the connections it actually opens.
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
 
     def _load_config(self):
         if os.path.exists(CONFIG_FILE):
@@ -69,10 +115,20 @@ class CSFloatScraper:
                     return {"api_key": None, "is_valid": False}
         return {"api_key": None, "is_valid": False}
 
+    def _load_case_ttls(self):
+        ttl_hours = dict(CASE_TTL_HOURS)
+        ttl_hours.update(self.config.get("case_ttl_hours", {}))
+        return {name: timedelta(hours=float(hours)) for name, hours in ttl_hours.items()}
+
     def _save_config(self, config):
         with open(CONFIG_FILE, "w") as f:
             json.dump(config, f, indent=4)
 
+    def update_config(self, **values):
+        with self.config_lock:
+            self.config.update(values)
+            self._save_config(self.config)
+
     def _load_api_key(self):
         return self.config.get("api_key")
 
@@ -95,18 +151,25 @@ class CSFloatScraper:
         return {}
 
     def save_cache(self):
-        cache_copy = {k: {"price": v["price"], "timestamp": v["timestamp"].isoformat()} for k, v in self.price_cache.items()}
-        with open(PRICE_CACHE_FILE, "w") as f:
-            json.dump(cache_copy, f, indent=4)
+        with self.cache_lock:
+            cache_copy = {k: {**v, "timestamp": v["timestamp"].isoformat()} for k, v in self.price_cache.items()}
+        # A refresh and the shutdown hook can both save; the rename keeps either writer from
+        # leaving a half-written file behind.
+        tmp_file = f"{PRICE_CACHE_FILE}.{threading.get_ident()}.tmp"
+        with FILE_IO_SECONDS.time(store="price_cache", operation="save"):
+            with open(tmp_file, "w") as f:
+                json.dump(cache_copy, f, indent=4)
+            os.replace(tmp_file, PRICE_CACHE_FILE)
         logger.info("Price cache saved to file")
 
     def validate_api_key(self, api_key):
         if not api_key:
             return False
-        url = "https://csfloat.com/api/v1/listings"
+        import requests
+
         headers = {"Authorization": api_key}
         try:
-            response = requests.get(url, headers=headers, params={"limit": 1})
+            response = self.session.get(self.api_url, headers=headers, params={"limit": 1})
             response.raise_for_status()
             return True
         except requests.exceptions.RequestException:
@@ -114,114 +177,173 @@ class CSFloatScraper:
 
     def set_api_key(self, api_key):
         if self.validate_api_key(api_key):
-            self.config["api_key"] = api_key
-            self.config["is_valid"] = True
-            self._save_config(self.config)
+            with self.config_lock:
+                self.config["api_key"] = api_key
+                self.config["is_valid"] = True
+                self._save_config(self.config)
             self.api_key = api_key
             logger.info("API key validated and saved")
             return True
         return False
 
-    def fetch_prices(self, item_names):
+    def _quote_from_listings(self, listings):
+        # listings_seen counts the cheapest listings we looked at, not the size of the market, so
+        # it never exceeds page_size.
+        prices = sorted(listing["price"] for listing in listings)
+        quote = {"price": round(prices[0] / 100, 2), "listings_seen": min(len(prices), self.page_size), "spread": None}
+        if len(prices) > 1:
+            quote["spread"] = round((prices[1] - prices[0]) / 100, 2)
+        return quote
+
+    def _get_listings(self, params, label):
+        headers = {"Authorization": self.api_key}
+        logger.debug(f"Fetching listings for {label} with params: {params}")
+        response = self.scheduler.get(self.api_url, headers=headers, params=params)
+        data = response.json()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"API response for {label}: {json.dumps(data, indent=2)}")
+        return data.get("data", data.get("listings", []))
+
+    def _fetch_item_quote(self, item_name, def_index):
+        params = {
+            "type": "buy_now",
+            "sort_by": "lowest_price",
+            "limit": self.page_size,
+            "def_index": def_index
+        }
+        listings = self._get_listings(params, item_name)
+        if not listings:
+            return None
+        quote = self._quote_from_listings(listings)
+        logger.info(f"Fetched price for {item_name} (market_hash_name: {listings[0]['item']['market_hash_name']}): ${quote['price']}")
+        return quote
+
+    def _notify_price(self, item_name):
+        info = self.get_price_info(item_name)
+        for listener in self.price_listeners:
+            try:
+                listener(item_name, info)
+            except Exception as e:
+                logger.error(f"Price listener failed for {item_name}: {e}")
+
+    def get_ttl(self, item_name):
+        return self.case_ttls.get(item_name, self.CACHE_EXPIRY)
+
+    def is_fresh(self, item_name):
+        entry = self.price_cache.get(item_name)
+        return entry is not None and datetime.now() - entry["timestamp"] < self.get_ttl(item_name)
+
+    def stale_items(self, item_names):
+        return [item_name for item_name in item_names if not self.is_fresh(item_name)]
+
+    def fetch_prices(self, item_names, only_stale=False):
         if not self.api_key:
             logger.error("No API key available, cannot fetch prices")
             return False
+        import requests
+
+        if only_stale:
+            requested = len(item_names)
+            item_names = self.stale_items(item_names)
+            logger.info(f"Incremental refresh: {len(item_names)} of {requested} case(s) are stale or missing")
 
-        url = "https://csfloat.com/api/v1/listings"
-        headers = {"Authorization": self.api_key}
         price_queue = {}
+        cache_changed = False
+        jobs = []
+        for item_name in item_names:
+            case = CATALOG.get(item_name)
+            def_index = case.def_index if case is not None else None
+            if not def_index:
+                logger.warning(f"No def_index found for {item_name}, skipping")
+                continue
+            jobs.append((item_name, def_index))
 
-        try:
-            for item_name in item_names:
-                def_index = ITEM_DEF_INDEX.get(item_name)
-                if not def_index:
-                    logger.warning(f"No def_index found for {item_name}, skipping")
-                    continue
-
-                params = {
-                    "type": "buy_now",
-                    "sort_by": "lowest_price",
-                    "limit": 50,
-                    "def_index": def_index,
-                    "page": 0
-                }
-
-                page = 0
-                while True:
-                    params["page"] = page
-                    logger.info(f"Fetching page {page} for {item_name} with params: {params}")
-                    response = requests.get(url, headers=headers, params=params)
-                    response.raise_for_status()
-                    data = response.json()
-                    logger.info(f"Page {page} API response for {item_name}: {json.dumps(data, indent=2)}")
-
-                    listings = data.get("data", data.get("listings", []))
-                    logger.info(f"Found {len(listings)} listings for {item_name} on page {page} (from 'data' or 'listings')")
-
-                    if not listings:
-                        logger.warning(f"No more listings found for {item_name} on page {page}, stopping pagination")
-                        break
-
-                    if listings:
-                        listing = listings[0]
-                        market_hash_name = listing["item"]["market_hash_name"]
-                        price_cents = listing["price"]
-                        price_dollars = round(price_cents / 100, 2)
-                        price_queue[item_name] = price_dollars
-                        logger.info(f"Fetched price for {item_name} (market_hash_name: {market_hash_name}): ${price_dollars}")
-                        break
-
-                    page += 1
-
-            for item_name in item_names:
-                if item_name not in price_queue:
-                    logger.warning(f"No listing found for {item_name} after pagination")
-
-            self.price_cache.clear()
-            for name, price in price_queue.items():
-                self.price_cache[name] = {"price": price, "timestamp": datetime.now()}
-            self.save_cache()
-            return True
+        fetch_status = {}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(jobs)))) as executor:
+            pending = {executor.submit(self._fetch_item_quote, item_name, def_index): item_name for item_name, def_index in jobs}
+            # Commit each case as soon as it lands so listeners can push it out immediately;
+            # cases that error keep their previous cache entry.
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item_name = pending.pop(future)
+                    try:
+                        quote = future.result()
+                    except requests.exceptions.RequestException as e:
+                        logger.error(f"Failed to fetch price for {item_name}: {str(e)}")
+                        if hasattr(e, 'response') and e.response is not None:
+                            logger.error(f"Response status: {e.response.status_code}")
+                            logger.error(f"Response body: {e.response.text}")
+                        fetch_status[item_name] = {"status": "error", "error": str(e)}
+                        continue
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch prices: {str(e)}")
-            if hasattr(e, 'response') and e.response is not None:
-                logger.error(f"Response status: {e.response.status_code}")
-                logger.error(f"Response body: {e.response.text}")
-            return False
+                    if quote is not None:
+                        price_queue[item_name] = quote["price"]
+                        fetch_status[item_name] = {"status": "ok"}
+                        entry = {**quote, "timestamp": datetime.now()}
+                        with self.cache_lock:
+                            self.price_cache[item_name] = entry
+                            self.price_columns.set(item_name, quote["price"], entry["timestamp"])
+                            self.price_revision += 1
+                        self._notify_price(item_name)
+                    else:
+                        logger.warning(f"No listing found for {item_name}")
+                        fetch_status[item_name] = {"status": "no_listings"}
+                        with self.cache_lock:
+                            removed = self.price_cache.pop(item_name, None)
+                            self.price_columns.clear(item_name)
+                            self.price_revision += 1
+                        if removed is not None:
+                            cache_changed = True
+                        self._notify_price(item_name)
+        PRICE_REFRESH_SECONDS.observe(time.perf_counter() - started)
 
-    def get_price(self, item_name):
-        if item_name in self.price_cache:
-            if datetime.now() - self.price_cache[item_name]["timestamp"] < self.CACHE_EXPIRY:
-                logger.info(f"Using cached price for {item_name}: ${self.price_cache[item_name]['price']}")
-                return self.price_cache[item_name]["price"]
-        return None
+        self.fetch_status = fetch_status
+        # The refresh is the only writer of the cache, so this is the one place it is flushed.
+        if price_queue or cache_changed:
+            self.save_cache()
 
-    def append_price_history(self, case_names):
-        history_file = "price_history.json"
-        history = {}
-        if os.path.exists(history_file):
-            try:
-                with open(history_file, "r") as f:
-                    history = json.load(f)
-            except Exception as e:
-                logger.warning(f"Could not load existing price history: {e}")
+        failed = [name for name, status in fetch_status.items() if status["status"] == "error"]
+        if failed:
+            logger.warning(f"Price refresh finished with {len(failed)} failed case(s): {', '.join(failed)}")
+        return not jobs or len(failed) < len(jobs)
 
-        today = datetime.now().strftime("%Y-%m-%d")
+    def get_price(self, item_name, allow_stale=False):
+        # A single dict lookup, so a concurrent refresh can swap the entry out underneath
+        # without a reader ever seeing a half-removed key.
+        entry = self.price_cache.get(item_name)
+        if entry is not None:
+            if datetime.now() - entry["timestamp"] < self.get_ttl(item_name):
+                PRICE_CACHE_LOOKUPS.inc(result="hit")
+                logger.debug(f"Using cached price for {item_name}: ${entry['price']}")
+                return entry["price"]
+            if allow_stale:
+                PRICE_CACHE_LOOKUPS.inc(result="stale")
+                return entry["price"]
+        PRICE_CACHE_LOOKUPS.inc(result="miss")
+        return None
 
-        for case_name in case_names:
-            price = self.get_price(case_name)
-            if price is not None:
-                if case_name not in history:
-                    history[case_name] = []
-                history[case_name].append({"date": today, "price": price})
+    def get_price_info(self, item_name):
+        entry = self.price_cache.get(item_name)
+        if entry is None:
+            return None
+        return {
+            "price": entry["price"],
+            "listings_seen": entry.get("listings_seen"),
+            "spread": entry.get("spread"),
+            "timestamp": entry["timestamp"].isoformat(timespec="seconds"),
+            "stale": datetime.now() - entry["timestamp"] >= self.get_ttl(item_name)
+        }
 
+    def append_price_history(self, case_names):
+        prices = {case_name: self.get_price(case_name) for case_name in case_names}
         try:
-            with open(history_file, "w") as f:
-                json.dump(history, f, indent=2)
-            logger.info("Appended to price_history.json")
+            with FILE_IO_SECONDS.time(store="price_history", operation="append"):
+                written = self.history.append(prices)
+            logger.info(f"Recorded {written} price point(s) in price history")
         except Exception as e:
             logger.error(f"Failed to write price history: {e}")
 
     def close(self):
-        self.save_cache()
\ No newline at end of file
+        self.save_cache()
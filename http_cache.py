@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Fingerprinted static URLs never change content, so they can be cached for a year.
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MIN_COMPRESS_BYTES = 512
+COMPRESSIBLE_TYPES = ("application/json", "text/html", "text/css", "text/javascript", "application/javascript", "text/plain")
+MAX_COMPRESSED_ASSETS = 64
+# Portfolio and price revisions restart from zero with the process, so every ETag carries the
+# boot time to keep a pre-restart validator from matching a different body.
+BOOT_ID = format(int(time.time()), "x")
+
+
+class StaticFingerprints:
+    # Short content hashes for files under the static folder, recomputed only when a
+    # file's mtime or size changes.
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.hashes = {}
+        self.lock = threading.Lock()
+
+    def get(self, filename):
+        path = os.path.join(self.static_folder, filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            cached = self.hashes.get(filename)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        with self.lock:
+            self.hashes[filename] = (key, digest)
+        return digest
+
+    def versions(self, subdir):
+        folder = os.path.join(self.static_folder, subdir)
+        if not os.path.isdir(folder):
+            return {}
+        return {
+            name: self.get(f"{subdir}/{name}")
+            for name in sorted(os.listdir(folder))
+            if os.path.isfile(os.path.join(folder, name))
+        }
+
+
+def revision_etag(*parts):
+    return ":".join(str(part) for part in (BOOT_ID,) + parts)
+
+
+def pick_encoding(accept_encoding):
+    if brotli is not None and "br" in accept_encoding:
+        return "br"
+    if "gzip" in accept_encoding:
+        return "gzip"
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+class CompressedAssets:
+    # Static files are compressed once per (file version, encoding) rather than per request.
+    def __init__(self, max_entries=MAX_COMPRESSED_ASSETS):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, data, encoding):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        body = compress(data, encoding)
+        with self.lock:
+            self.entries[key] = body
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return body
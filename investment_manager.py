@@ -1,81 +1,358 @@
+import atexit
 import json
+import logging
+import math
 import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from metrics import FILE_IO_SECONDS
+
+logger = logging.getLogger(__name__)
 
 INVESTMENTS_FILE = "cs2_investments.json"
+FLUSH_DELAY = 0.5
+MAX_CHANGE_LOG = 200
+COST_BASIS_METHODS = ("average", "fifo")
+TRADE_TYPES = ("buy", "sell")
+DEFAULT_COST_BASIS = "average"
+
+
+def new_position(method):
+    return {
+        "method": method,
+        "quantity": 0,
+        "cost_value": 0.0,
+        "bought_qty": 0,
+        "bought_value": 0.0,
+        "sold_qty": 0,
+        "sold_value": 0.0,
+        "realized_pl": 0.0,
+        "lots": []
+    }
+
+def apply_event(position, event):
+    quantity = event["quantity"]
+    price = event["price_per_case"]
+    if event["type"] == "buy":
+        position["quantity"] += quantity
+        position["cost_value"] += quantity * price
+        position["bought_qty"] += quantity
+        position["bought_value"] += quantity * price
+        if position["method"] == "fifo":
+            position["lots"].append([quantity, price])
+    elif event["type"] == "sell":
+        quantity = min(quantity, position["quantity"])
+        if position["method"] == "fifo":
+            cost = 0.0
+            remaining = quantity
+            while remaining > 0 and position["lots"]:
+                lot = position["lots"][0]
+                used = min(remaining, lot[0])
+                cost += used * lot[1]
+                remaining -= used
+                lot[0] -= used
+                if lot[0] == 0:
+                    position["lots"].pop(0)
+        else:
+            cost = quantity * position["cost_value"] / position["quantity"] if position["quantity"] else 0.0
+        position["quantity"] -= quantity
+        position["cost_value"] = position["cost_value"] - cost if position["quantity"] else 0.0
+        position["sold_qty"] += quantity
+        position["sold_value"] += quantity * price
+        position["realized_pl"] += quantity * price - cost
+    elif event["type"] == "adjust":
+        # Manual edits reset the open position; they are logged so a replay lands in the same place.
+        position["quantity"] = quantity
+        position["cost_value"] = quantity * price
+        position["lots"] = [[quantity, price]] if quantity and position["method"] == "fifo" else []
+    return position
+
+def _sync_position(inv):
+    position = inv["position"]
+    inv["quantity"] = position["quantity"]
+    inv["purchase_price"] = position["cost_value"] / position["quantity"] if position["quantity"] > 0 else 0.0
+    inv["total_sold_value"] = position["sold_value"]
+
+def _adjust_event(quantity, price_per_case, date=None):
+    return {
+        "type": "adjust",
+        "quantity": quantity,
+        "price_per_case": price_per_case,
+        "total": quantity * price_per_case,
+        "date": date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+
+def _check_price(price_per_case):
+    if not isinstance(price_per_case, (int, float)) or not math.isfinite(price_per_case) or price_per_case < 0:
+        raise ValueError("price_per_case must be a finite, non-negative number")
+
+def rebuild_position(inv, method=DEFAULT_COST_BASIS, reconcile=False):
+    position = new_position(method)
+    for event in inv["transactions"]:
+        apply_event(position, event)
+    if reconcile:
+        # Older files could change quantity/price without a ledger entry; record the difference
+        # once so the log becomes the single source of truth from here on.
+        quantity = inv.get("quantity", 0)
+        price = inv.get("purchase_price", 0.0)
+        expected_price = position["cost_value"] / position["quantity"] if position["quantity"] > 0 else 0.0
+        if quantity != position["quantity"] or (quantity > 0 and abs(price - expected_price) > 1e-9):
+            event = _adjust_event(quantity, price)
+            inv["transactions"].append(event)
+            apply_event(position, event)
+    inv["position"] = position
+    _sync_position(inv)
+    return position
+
+def stored_view(investments):
+    # What gets written to disk and sent to clients: everything except the derived position.
+    return [{key: value for key, value in inv.items() if key != "position"} for inv in investments]
+
+def load_investments(cost_basis=DEFAULT_COST_BASIS, storage=None):
+    return (storage or DEFAULT_STORAGE).load(cost_basis)
+
+class Portfolio:
+    __slots__ = ("investments", "cost_basis", "storage", "revision", "changes", "listeners", "lock", "_positions")
+
+    def __init__(self, investments, cost_basis=DEFAULT_COST_BASIS, storage=None):
+        self.investments = investments
+        self.cost_basis = cost_basis
+        self.storage = storage or DEFAULT_STORAGE
+        self.lock = self.storage.lock
+        self.revision = 0
+        self.changes = deque(maxlen=MAX_CHANGE_LOG)
+        self.listeners = []
+        self._positions = None
+
+    def set_cost_basis(self, method):
+        if method not in COST_BASIS_METHODS:
+            raise ValueError(f"Unsupported cost basis method: {method}")
+        with self.lock:
+            self.cost_basis = method
+            for inv in self.investments:
+                rebuild_position(inv, method)
+            self.storage.save(self.investments)
+            return self.record(changed=[inv["item_name"] for inv in self.investments])
+
+    def record(self, changed=(), removed=(), reordered=False):
+        with self.lock:
+            self.revision += 1
+            revision = self.revision
+            self.changes.append((revision, {"changed": set(changed), "removed": set(removed), "reordered": reordered}))
+            if reordered or removed:
+                self._positions = None
+        for listener in self.listeners:
+            listener(revision)
+        return revision
+
+    def find(self, item_name):
+        positions = self._positions
+        if positions is None or len(positions) != len(self.investments):
+            positions = self._positions = {inv["item_name"]: i for i, inv in enumerate(self.investments)}
+        index = positions.get(item_name)
+        if index is not None and self.investments[index]["item_name"] != item_name:
+            # The list was edited without going through record(); rebuild once and retry.
+            self._positions = None
+            return self.find(item_name)
+        return index
+
+    def diff_since(self, revision):
+        # Returns None when the client is too far behind (or ahead) to patch and needs the full list.
+        with self.lock:
+            return self._diff_since(revision)
+
+    def _diff_since(self, revision):
+        if revision is None or revision > self.revision:
+            return None
+        if revision < self.revision and (not self.changes or revision < self.changes[0][0] - 1):
+            return None
+
+        changed, removed, reordered = set(), set(), False
+        for change_revision, change in self.changes:
+            if change_revision > revision:
+                changed |= change["changed"]
+                removed |= change["removed"]
+                reordered = reordered or change["reordered"]
+
+        indexes = [self.find(name) for name in changed]
+        diff = {
+            "changed": stored_view(self.investments[index] for index in indexes if index is not None),
+            "removed": [name for name in removed if self.find(name) is None]
+        }
+        if reordered:
+            diff["order"] = [inv["item_name"] for inv in self.investments]
+        return diff
+
+class InvestmentStorage:
+    # One portfolio's JSON file: atomic writes, plus a debounced path that coalesces bursts of
+    # non-durable saves into a single write.
+    def __init__(self, path=INVESTMENTS_FILE):
+        self.path = path
+        # Guards the in-memory investments list. Route handlers hold it across a mutation and
+        # the response built from it; the debounced writer holds it while serializing. Always
+        # taken before flush_lock.
+        self.lock = threading.RLock()
+        self.flush_lock = threading.Lock()
+        self.timer = None
+        self.pending = None
+        _open_storages.add(self)
 
-def load_investments():
-    if os.path.exists(INVESTMENTS_FILE):
-        with open(INVESTMENTS_FILE, "r") as f:
+    def load(self, cost_basis=DEFAULT_COST_BASIS):
+        if not os.path.exists(self.path):
+            return []
+        with FILE_IO_SECONDS.time(store="investments", operation="load"), open(self.path, "r") as f:
             investments = json.load(f)
-            for inv in investments:
-                if "transactions" not in inv:
-                    inv["transactions"] = []
-                if "total_sold_value" not in inv:
-                    inv["total_sold_value"] = 0.0
-            return investments
-    return []
-
-def save_investments(investments):
-    with open(INVESTMENTS_FILE, "w") as f:
-        json.dump(investments, f, indent=4)
-
-def add_investment(investments, new_investment):
+        for inv in investments:
+            if "transactions" not in inv:
+                inv["transactions"] = []
+            if "total_sold_value" not in inv:
+                inv["total_sold_value"] = 0.0
+            # Positions are derived state and never stored; replaying the ledger is the only way
+            # one is built. A quantity or price that disagrees with the replay (files from before
+            # the ledger, or edited by hand) is recorded once as an adjustment.
+            inv.pop("position", None)
+            rebuild_position(inv, cost_basis, reconcile=True)
+        return investments
+
+    def _write(self, investments):
+        # Write to a sibling temp file and rename over the original so a crash mid-write
+        # leaves either the old or the new portfolio on disk, never a truncated one.
+        tmp_file = self.path + ".tmp"
+        with FILE_IO_SECONDS.time(store="investments", operation="save"), open(tmp_file, "w") as f:
+            json.dump(stored_view(investments), f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+
+    def flush(self):
+        with self.lock, self.flush_lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            investments, self.pending = self.pending, None
+            if investments is not None:
+                self._write(investments)
+
+    def save(self, investments, durable=True):
+        if durable:
+            with self.lock, self.flush_lock:
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+                self.pending = None
+                self._write(investments)
+            return
+
+        # Coalesce bursts of edits into a single write once they settle for FLUSH_DELAY seconds.
+        with self.flush_lock:
+            self.pending = investments
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = threading.Timer(FLUSH_DELAY, self._flush_pending)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _flush_pending(self):
+        try:
+            self.flush()
+        except OSError as e:
+            logger.error(f"Failed to save investments to {self.path}: {e}")
+
+    def close(self):
+        self.flush()
+        _open_storages.discard(self)
+
+_open_storages = set()
+DEFAULT_STORAGE = InvestmentStorage(INVESTMENTS_FILE)
+# Kept for callers that lock the default portfolio directly.
+state_lock = DEFAULT_STORAGE.lock
+
+def flush_investments(storage=None):
+    storages = [storage] if storage is not None else list(_open_storages)
+    for item in storages:
+        item.flush()
+
+def save_investments(investments, durable=True, storage=None):
+    (storage or DEFAULT_STORAGE).save(investments, durable)
+
+atexit.register(flush_investments)
+
+def add_investment(investments, new_investment, durable=True, cost_basis=DEFAULT_COST_BASIS, storage=None):
+    storage = storage or DEFAULT_STORAGE
     new_investment["transactions"] = new_investment.get("transactions", [])
     new_investment["total_sold_value"] = new_investment.get("total_sold_value", 0.0)
-    investments.append(new_investment)
-    save_investments(investments)
-
-def remove_investment(investments, index):
-    if 0 <= index < len(investments):
-        investments.pop(index)
-        save_investments(investments)
-
-def update_investment(investments, index, field, value):
-    if 0 <= index < len(investments):
-        if field == "quantity":
-            try:
-                new_value = int(value)
-                investments[index]["quantity"] = new_value if new_value > 0 else investments[index]["quantity"]
-            except (ValueError, TypeError):
-                pass
-        elif field == "purchase_price":
-            try:
-                new_value = float(value)
-                investments[index]["purchase_price"] = new_value if new_value >= 0 else investments[index]["purchase_price"]
-            except (ValueError, TypeError):
-                pass
-        save_investments(investments)
-
-def add_transaction(investments, index, transaction_type, quantity, price_per_case):
-    if 0 <= index < len(investments):
-        inv = investments[index]
-        transaction = {
-            "type": transaction_type,
-            "quantity": quantity,
-            "price_per_case": price_per_case,
-            "total": quantity * price_per_case,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        inv["transactions"].append(transaction)
-
-        if transaction_type == "buy":
-            current_qty = inv["quantity"]
-            current_total = current_qty * inv["purchase_price"]
-            new_qty = quantity
-            new_total = new_qty * price_per_case
-            inv["quantity"] = current_qty + new_qty
-            inv["purchase_price"] = (current_total + new_total) / inv["quantity"] if inv["quantity"] > 0 else 0.0
-        elif transaction_type == "sell":
-            inv["quantity"] = max(0, inv["quantity"] - quantity)
-            inv["total_sold_value"] = inv.get("total_sold_value", 0.0) + (quantity * price_per_case)
-            buy_transactions = [t for t in inv["transactions"] if t["type"] == "buy"]
-            if inv["quantity"] > 0 and buy_transactions:
-                total_buy_qty = sum(t["quantity"] for t in buy_transactions)
-                total_buy_value = sum(t["quantity"] * t["price_per_case"] for t in buy_transactions)
-                inv["purchase_price"] = total_buy_value / total_buy_qty if total_buy_qty > 0 else 0.0
-            else:
-                inv["purchase_price"] = 0.0
-
-        save_investments(investments)
-
-from datetime import datetime
\ No newline at end of file
+    rebuild_position(new_investment, cost_basis, reconcile=True)
+    with storage.lock:
+        investments.append(new_investment)
+        storage.save(investments, durable)
+
+def remove_investment(investments, index, durable=True, storage=None):
+    storage = storage or DEFAULT_STORAGE
+    with storage.lock:
+        if 0 <= index < len(investments):
+            investments.pop(index)
+            storage.save(investments, durable)
+
+def update_investment(investments, index, field, value, durable=False, storage=None):
+    storage = storage or DEFAULT_STORAGE
+    with storage.lock:
+        if 0 <= index < len(investments):
+            inv = investments[index]
+            quantity = inv["quantity"]
+            price = inv["purchase_price"]
+            if field == "quantity":
+                try:
+                    new_value = int(value)
+                    quantity = new_value if new_value > 0 else quantity
+                except (ValueError, TypeError):
+                    pass
+            elif field == "purchase_price":
+                try:
+                    new_value = float(value)
+                    price = new_value if math.isfinite(new_value) and new_value >= 0 else price
+                except (ValueError, TypeError):
+                    pass
+            if quantity != inv["quantity"] or price != inv["purchase_price"]:
+                record_adjustment(inv, quantity, price)
+            storage.save(investments, durable)
+
+def _record(inv, event):
+    inv["transactions"].append(event)
+    apply_event(inv["position"], event)
+    _sync_position(inv)
+    return event
+
+def record_transaction(inv, transaction_type, quantity, price_per_case, date=None):
+    # Appends to the ledger and updates the position without saving; callers hold the
+    # storage lock and decide when to write. The ledger is the source of truth, so anything
+    # a replay could not reproduce is refused here rather than stored.
+    if transaction_type not in TRADE_TYPES:
+        raise ValueError(f"Unsupported transaction type: {transaction_type}")
+    if not isinstance(quantity, int) or quantity <= 0:
+        raise ValueError("quantity must be a positive whole number")
+    _check_price(price_per_case)
+    if transaction_type == "sell" and quantity > inv["position"]["quantity"]:
+        raise ValueError(f"Cannot sell {quantity} {inv['item_name']}: only {inv['position']['quantity']} held")
+    return _record(inv, {
+        "type": transaction_type,
+        "quantity": quantity,
+        "price_per_case": price_per_case,
+        "total": quantity * price_per_case,
+        "date": date or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    })
+
+def record_adjustment(inv, quantity, price_per_case, date=None):
+    # Resets the open position to quantity at price_per_case; same contract as record_transaction.
+    if not isinstance(quantity, int) or quantity < 0:
+        raise ValueError("quantity must be a non-negative whole number")
+    _check_price(price_per_case)
+    return _record(inv, _adjust_event(quantity, price_per_case, date))
+
+def add_transaction(investments, index, transaction_type, quantity, price_per_case, durable=True, storage=None, date=None):
+    storage = storage or DEFAULT_STORAGE
+    with storage.lock:
+        if 0 <= index < len(investments):
+            record_transaction(investments[index], transaction_type, quantity, price_per_case, date)
+            storage.save(investments, durable)
@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+import math
+from datetime import datetime
+
+from catalog import CATALOG
+from investment_manager import rebuild_position, record_adjustment, record_transaction
+
+IMPORT_FORMATS = ("csv", "jsonl")
+TRANSACTION_TYPES = ("buy", "sell", "adjust")
+EXPORT_FIELDS = ("case", "type", "quantity", "price_per_case", "total", "date")
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d")
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(requested, content_type):
+    fmt = (requested or "").lower()
+    if not fmt:
+        content_type = (content_type or "").lower()
+        fmt = "jsonl" if "json" in content_type else "csv"
+    if fmt == "ndjson":
+        fmt = "jsonl"
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    return fmt
+
+
+def read_rows(stream, fmt):
+    # Yields (line number, raw row) one at a time straight off the request body; a line that
+    # cannot be parsed yields the ValueError in place of the row.
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+        yield line_number, row if isinstance(row, dict) else ValueError("Each line must be a JSON object")
+
+
+def _parse_date(value):
+    if not value:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {value}")
+
+
+def validate_row(row):
+    if isinstance(row, Exception):
+        raise row
+    name = str(row.get("case") or row.get("item_name") or "").strip()
+    if name not in CATALOG:
+        raise ValueError(f"Unknown case: {name or '(blank)'}")
+    transaction_type = str(row.get("type") or "").strip().lower()
+    if transaction_type not in TRANSACTION_TYPES:
+        raise ValueError(f"Unsupported transaction type: {transaction_type or '(blank)'}")
+    try:
+        quantity = int(row.get("quantity"))
+        price = float(row.get("price_per_case", row.get("price")))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("quantity and price_per_case must be numbers")
+    if not math.isfinite(price):
+        raise ValueError("price_per_case must be a finite number")
+    if quantity < 0 or (quantity == 0 and transaction_type != "adjust") or price < 0:
+        raise ValueError("quantity must be positive and price_per_case non-negative")
+    return name, transaction_type, quantity, price, _parse_date(row.get("date"))
+
+
+def import_transactions(portfolio, rows, dry_run=False, price_for=None):
+    # Rows are parsed and validated as they stream in, then applied in one pass under the
+    # portfolio lock with a single durable save at the end instead of one per row. price_for
+    # seeds the market price of cases the import creates, as /add_case does.
+    valid = []
+    errors = []
+    error_count = 0
+
+    def reject(line_number, message):
+        nonlocal error_count
+        error_count += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line_number, "error": message})
+
+    for line_number, row in rows:
+        try:
+            valid.append((line_number, validate_row(row)))
+        except ValueError as e:
+            reject(line_number, str(e))
+
+    investments = portfolio.investments
+    result = {"valid": 0, "imported": 0, "created": [], "error_count": 0, "errors": errors}
+    with portfolio.lock:
+        # Sells are checked against the running holding, in file order, so an oversell is
+        # reported as a line error (dry run included) rather than recorded.
+        held = {}
+        accepted = []
+        for line_number, (name, transaction_type, quantity, price, date) in valid:
+            if name not in held:
+                index = portfolio.find(name)
+                held[name] = investments[index]["position"]["quantity"] if index is not None else 0
+            if transaction_type == "sell" and quantity > held[name]:
+                reject(line_number, f"Cannot sell {quantity} {name}: only {held[name]} held")
+                continue
+            if transaction_type == "adjust":
+                held[name] = quantity
+            else:
+                held[name] += quantity if transaction_type == "buy" else -quantity
+            accepted.append((name, transaction_type, quantity, price, date))
+
+        result["valid"] = len(accepted)
+        result["error_count"] = error_count
+        if dry_run or not accepted:
+            return result
+
+        changed = set()
+        for name, transaction_type, quantity, price, date in accepted:
+            index = portfolio.find(name)
+            if index is None:
+                inv = {
+                    "item_name": name,
+                    "quantity": 0,
+                    "purchase_price": 0.0,
+                    "purchase_date": date[:10],
+                    "lowest_price": price_for(name) if price_for else None,
+                    "last_updated": "",
+                    "transactions": [],
+                    "total_sold_value": 0.0
+                }
+                rebuild_position(inv, portfolio.cost_basis)
+                investments.append(inv)
+                result["created"].append(name)
+            else:
+                inv = investments[index]
+            if transaction_type == "adjust":
+                record_adjustment(inv, quantity, price, date)
+            else:
+                record_transaction(inv, transaction_type, quantity, price, date)
+            changed.add(name)
+        portfolio.storage.save(investments)
+        portfolio.record(changed=changed, reordered=bool(result["created"]))
+    result["imported"] = len(accepted)
+    return result
+
+
+def export_transactions(portfolio, fmt):
+    # Copies one investment's ledger at a time under the lock, so a large portfolio is never
+    # held in memory as a single export body.
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        yield buffer.getvalue()
+
+    with portfolio.lock:
+        names = [inv["item_name"] for inv in portfolio.investments]
+    for name in names:
+        with portfolio.lock:
+            index = portfolio.find(name)
+            if index is None:
+                continue
+            transactions = list(portfolio.investments[index]["transactions"])
+        if fmt == "csv":
+            buffer.seek(0)
+            buffer.truncate()
+            for transaction in transactions:
+                writer.writerow([name] + [transaction.get(field) for field in EXPORT_FIELDS[1:]])
+            yield buffer.getvalue()
+        else:
+            yield "".join(json.dumps({"case": name, **{field: transaction.get(field) for field in EXPORT_FIELDS[1:]}}) + "\n" for transaction in transactions)
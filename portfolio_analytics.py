@@ -0,0 +1,160 @@
+import calendar
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from investment_manager import new_position, apply_event
+
+MAX_CACHED_RESULTS = 32
+
+
+def bucket_end(bucket, key):
+    day = datetime.strptime(key, "%Y-%m-%d")
+    if bucket == "week":
+        day += timedelta(days=6)
+    elif bucket == "month":
+        day = day.replace(day=calendar.monthrange(day.year, day.month)[1])
+    return day.strftime("%Y-%m-%d")
+
+
+class PortfolioAnalytics:
+    def __init__(self, portfolio, history):
+        self.portfolio = portfolio
+        self.history = history
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _memoize(self, key, compute):
+        # Results only depend on the ledger and the stored prices, so the two revisions are a
+        # complete cache key; any edit or new price point naturally misses.
+        key = (self.portfolio.revision, self.history.revision) + key
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+        result = compute()
+        with self.lock:
+            self.cache[key] = result
+            while len(self.cache) > MAX_CACHED_RESULTS:
+                self.cache.popitem(last=False)
+        return result
+
+    def summary(self):
+        return self._memoize(("summary",), self._compute_summary)
+
+    def timeseries(self, cases=None, bucket="day", start=None, end=None):
+        cases = tuple(cases) if cases else None
+        return self._memoize(("timeseries", cases, bucket, start, end), lambda: self._compute_timeseries(cases, bucket, start, end))
+
+    def _compute_summary(self):
+        rows = []
+        for inv in self.portfolio.investments:
+            position = inv["position"]
+            price = self.history.latest_price(inv["item_name"])
+            if price is None:
+                price = inv.get("lowest_price")
+            value = position["quantity"] * price if price is not None else None
+            unrealized = value - position["cost_value"] if value is not None else None
+            rows.append({
+                "item_name": inv["item_name"],
+                "quantity": position["quantity"],
+                "price": price,
+                "invested": round(position["cost_value"], 2),
+                "value": round(value, 2) if value is not None else None,
+                "unrealized_pl": round(unrealized, 2) if unrealized is not None else None,
+                "realized_pl": round(position["realized_pl"], 2),
+                "roi": round(unrealized / position["cost_value"] * 100, 2) if unrealized is not None and position["cost_value"] else None
+            })
+
+        # A holding without any known price has no value to add, so it is left out of both
+        # sides of the unrealized totals rather than counted as worth $0, and listed instead.
+        priced = [row for row in rows if row["value"] is not None]
+        invested = sum(row["invested"] for row in priced)
+        value = sum(row["value"] for row in priced)
+        realized = sum(row["realized_pl"] for row in rows)
+        return {
+            "cases": rows,
+            "unpriced": [row["item_name"] for row in rows if row["value"] is None and row["quantity"] > 0],
+            "totals": {
+                "invested": round(invested, 2),
+                "value": round(value, 2),
+                "unrealized_pl": round(value - invested, 2),
+                "realized_pl": round(realized, 2),
+                "total_pl": round(value - invested + realized, 2)
+            }
+        }
+
+    def _position_columns(self, inv, ends):
+        # The position at the end of a bucket is the ledger-order replay of every event dated
+        # up to then, the same order the live position is built in. When the ledger's dates
+        # only ever increase that is a single pass sampled at each bucket end; a back-dated
+        # import breaks that, and those ledgers are replayed per bucket instead.
+        events = inv["transactions"]
+        method = inv["position"]["method"]
+        quantities, costs, realized = [], [], []
+
+        def sample(position):
+            quantities.append(position["quantity"])
+            costs.append(position["cost_value"])
+            realized.append(position["realized_pl"])
+
+        if all(events[i - 1]["date"] <= events[i]["date"] for i in range(1, len(events))):
+            position = new_position(method)
+            i = 0
+            for end in ends:
+                while i < len(events) and events[i]["date"][:10] <= end:
+                    apply_event(position, events[i])
+                    i += 1
+                sample(position)
+        else:
+            for end in ends:
+                position = new_position(method)
+                for event in events:
+                    if event["date"][:10] <= end:
+                        apply_event(position, event)
+                sample(position)
+        return quantities, costs, realized
+
+    def _compute_timeseries(self, cases, bucket, start, end):
+        investments = [inv for inv in self.portfolio.investments if cases is None or inv["item_name"] in cases]
+        names = [inv["item_name"] for inv in investments]
+        closes = self.history.aggregate(names, bucket=bucket, start=start, end=end)
+        keys = sorted({row["bucket"] for rows in closes.values() for row in rows})
+        ends = [bucket_end(bucket, key) for key in keys]
+
+        total_value = [0.0] * len(keys)
+        total_cost = [0.0] * len(keys)
+        total_realized = [0.0] * len(keys)
+        series = {}
+        for inv in investments:
+            by_bucket = {row["bucket"]: row["close"] for row in closes[inv["item_name"]]}
+            # Forward-fill missing buckets with the last close seen so far. Buckets before the
+            # first close have no price and, as in the summary, stay out of the value and
+            # invested totals instead of counting as worth $0.
+            prices = []
+            last = None
+            for key in keys:
+                last = by_bucket.get(key, last)
+                prices.append(last)
+            quantities, costs, realized = self._position_columns(inv, ends)
+            values = [q * p if p is not None else None for q, p in zip(quantities, prices)]
+            series[inv["item_name"]] = {
+                "quantity": quantities,
+                "price": prices,
+                "value": [round(v, 2) if v is not None else None for v in values],
+                "pl": [round(v - c + r, 2) if v is not None else None for v, c, r in zip(values, costs, realized)]
+            }
+            total_value = [t + v if v is not None else t for t, v in zip(total_value, values)]
+            total_cost = [t + c if v is not None else t for t, v, c in zip(total_cost, values, costs)]
+            total_realized = [t + r for t, r in zip(total_realized, realized)]
+
+        return {
+            "bucket": bucket,
+            "dates": keys,
+            "cases": series,
+            "total": {
+                "value": [round(v, 2) for v in total_value],
+                "invested": [round(c, 2) for c in total_cost],
+                "pl": [round(v - c + r, 2) for v, c, r in zip(total_value, total_cost, total_realized)]
+            }
+        }
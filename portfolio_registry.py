@@ -0,0 +1,186 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from itertools import count
+
+from investment_manager import DEFAULT_COST_BASIS, DEFAULT_STORAGE, InvestmentStorage, Portfolio
+from portfolio_analytics import PortfolioAnalytics
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_DIR = "portfolios"
+DEFAULT_PORTFOLIO_ID = "default"
+MAX_LOADED_PORTFOLIOS = 16
+# A portfolio touched this recently may still have a request in flight, so it is kept even
+# when over capacity.
+MIN_IDLE_SECONDS = 60
+PORTFOLIO_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_generations = count(1)
+
+
+class LoadedPortfolio:
+    __slots__ = ("id", "portfolio", "analytics", "generation", "last_used")
+
+    def __init__(self, portfolio_id, portfolio, analytics):
+        self.id = portfolio_id
+        self.portfolio = portfolio
+        self.analytics = analytics
+        # Revisions restart at zero when a portfolio is reloaded after eviction; the
+        # generation tells the two lifetimes apart.
+        self.generation = next(_generations)
+        self.last_used = time.monotonic()
+
+    @property
+    def investments(self):
+        return self.portfolio.investments
+
+
+class PortfolioRegistry:
+    # Portfolios are loaded on first use and kept in LRU order; once more than max_loaded are
+    # in memory the least recently used idle ones are flushed and dropped. The default
+    # portfolio keeps its original cs2_investments.json and is never evicted. Every portfolio
+    # reads prices from the one shared scraper cache, so adding portfolios adds no API traffic.
+    def __init__(self, scraper, on_revision=None, max_loaded=MAX_LOADED_PORTFOLIOS, directory=PORTFOLIO_DIR):
+        self.scraper = scraper
+        self.on_revision = on_revision
+        self.max_loaded = max(1, max_loaded)
+        self.directory = directory
+        self.loaded = OrderedDict()
+        # Portfolio id -> Event for loads in progress; set once the entry is in loaded (or the
+        # load failed).
+        self.loading = {}
+        self.lock = threading.Lock()
+
+    def path_for(self, portfolio_id):
+        if portfolio_id == DEFAULT_PORTFOLIO_ID:
+            return DEFAULT_STORAGE.path
+        return os.path.join(self.directory, f"{portfolio_id}.json")
+
+    def exists(self, portfolio_id):
+        return portfolio_id == DEFAULT_PORTFOLIO_ID or os.path.exists(self.path_for(portfolio_id))
+
+    def ids(self):
+        ids = {DEFAULT_PORTFOLIO_ID}
+        if os.path.isdir(self.directory):
+            ids.update(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+        with self.lock:
+            ids.update(self.loaded)
+        return sorted(ids)
+
+    def cost_basis_for(self, portfolio_id):
+        if portfolio_id == DEFAULT_PORTFOLIO_ID:
+            return self.scraper.config.get("cost_basis", DEFAULT_COST_BASIS)
+        return self.scraper.config.get("portfolio_cost_basis", {}).get(portfolio_id, DEFAULT_COST_BASIS)
+
+    def save_cost_basis(self, portfolio_id, method):
+        if portfolio_id == DEFAULT_PORTFOLIO_ID:
+            self.scraper.update_config(cost_basis=method)
+        else:
+            methods = dict(self.scraper.config.get("portfolio_cost_basis", {}))
+            methods[portfolio_id] = method
+            self.scraper.update_config(portfolio_cost_basis=methods)
+
+    def _validate(self, portfolio_id):
+        if not PORTFOLIO_ID_PATTERN.match(portfolio_id or ""):
+            raise ValueError(f"Invalid portfolio id: {portfolio_id}")
+
+    def create(self, portfolio_id):
+        # Returns None when the portfolio already exists. The existence check and the
+        # reservation are one locked step, so two concurrent creates cannot both succeed.
+        self._validate(portfolio_id)
+        with self.lock:
+            if portfolio_id in self.loaded or portfolio_id in self.loading or self.exists(portfolio_id):
+                return None
+            pending = self.loading[portfolio_id] = threading.Event()
+        return self._finish_load(portfolio_id, pending)
+
+    def get(self, portfolio_id, create=False):
+        self._validate(portfolio_id)
+        while True:
+            with self.lock:
+                entry = self.loaded.get(portfolio_id)
+                if entry is not None:
+                    self.loaded.move_to_end(portfolio_id)
+                    entry.last_used = time.monotonic()
+                    return entry
+                pending = self.loading.get(portfolio_id)
+                if pending is None:
+                    if not create and not self.exists(portfolio_id):
+                        return None
+                    pending = self.loading[portfolio_id] = threading.Event()
+                    break
+            # Another request is loading this portfolio; wait for it and look again (if that
+            # load failed, this request retries it).
+            pending.wait()
+        return self._finish_load(portfolio_id, pending)
+
+    def peek(self, portfolio_id):
+        # The loaded entry or None; never reads from disk and does not count as a use, so
+        # background readers do not keep idle portfolios from being evicted.
+        with self.lock:
+            return self.loaded.get(portfolio_id)
+
+    def _finish_load(self, portfolio_id, pending):
+        # Reading and parsing the file happens outside the registry lock, so a large
+        # portfolio loading does not stall requests for the ones already in memory.
+        evicted = []
+        try:
+            entry = self._load(portfolio_id)
+            with self.lock:
+                self.loaded[portfolio_id] = entry
+                evicted = self._pick_evictions()
+        finally:
+            with self.lock:
+                self.loading.pop(portfolio_id, None)
+            pending.set()
+        for old in evicted:
+            old.portfolio.storage.close()
+            logger.info(f"Evicted idle portfolio {old.id}")
+        return entry
+
+    def _load(self, portfolio_id):
+        if portfolio_id == DEFAULT_PORTFOLIO_ID:
+            storage = DEFAULT_STORAGE
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+            storage = InvestmentStorage(self.path_for(portfolio_id))
+        cost_basis = self.cost_basis_for(portfolio_id)
+        investments = storage.load(cost_basis)
+        if portfolio_id != DEFAULT_PORTFOLIO_ID and not os.path.exists(storage.path):
+            storage.save(investments)
+        # Prices refreshed while this portfolio was unloaded are already in the shared cache.
+        for inv in investments:
+            price = self.scraper.get_price(inv["item_name"], allow_stale=True)
+            if price is not None:
+                inv["lowest_price"] = price
+        portfolio = Portfolio(investments, cost_basis, storage)
+        portfolio.listeners.append(partial(self._notify_revision, portfolio_id))
+        logger.info(f"Loaded portfolio {portfolio_id} ({len(investments)} case(s))")
+        return LoadedPortfolio(portfolio_id, portfolio, PortfolioAnalytics(portfolio, self.scraper.history))
+
+    def _notify_revision(self, portfolio_id, revision):
+        if self.on_revision is not None:
+            self.on_revision(portfolio_id, revision)
+
+    def _pick_evictions(self):
+        evicted = []
+        cutoff = time.monotonic() - MIN_IDLE_SECONDS
+        for portfolio_id, entry in list(self.loaded.items()):
+            if len(self.loaded) <= self.max_loaded:
+                break
+            if portfolio_id != DEFAULT_PORTFOLIO_ID and entry.last_used < cutoff:
+                evicted.append(self.loaded.pop(portfolio_id))
+        return evicted
+
+    def loaded_portfolios(self):
+        with self.lock:
+            return list(self.loaded.values())
+
+    def close(self):
+        for entry in self.loaded_portfolios():
+            entry.portfolio.storage.close()
@@ -0,0 +1,195 @@
+import json
+import logging
+import math
+import os
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+
+from catalog import CATALOG
+from metrics import ALERT_EVALUATIONS, FILE_IO_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ALERTS_FILE = "alerts.json"
+MAX_TRIGGERED_ALERTS = 200
+PRICE_KINDS = ("price_below", "price_above")
+POSITION_KINDS = ("pl_above_pct", "pl_below_pct")
+CHANGE_KINDS = ("daily_change_pct",)
+RULE_KINDS = PRICE_KINDS + POSITION_KINDS + CHANGE_KINDS
+# Returned by _value when a rule cannot be evaluated right now (its portfolio is not loaded);
+# the rule is left as it is rather than re-armed.
+UNAVAILABLE = object()
+
+
+def describe(rule):
+    if rule["kind"] == "price_below":
+        return f"{rule['case']} lowest price below ${rule['threshold']:.2f}"
+    if rule["kind"] == "price_above":
+        return f"{rule['case']} lowest price above ${rule['threshold']:.2f}"
+    if rule["kind"] == "pl_above_pct":
+        return f"{rule['case']} position P/L above {rule['threshold']:g}% ({rule['portfolio']})"
+    if rule["kind"] == "pl_below_pct":
+        return f"{rule['case']} position P/L below {rule['threshold']:g}% ({rule['portfolio']})"
+    return f"{rule['case']} daily change over {rule['threshold']:g}%"
+
+
+class AlertEngine:
+    # Rules are indexed by case, so a price update only evaluates the rules on that case and
+    # the cost per update does not grow with the total rule count. A rule fires when its
+    # condition goes from false to true and re-arms once it is false again, so a price that
+    # stays below a threshold alerts once rather than on every refresh.
+    def __init__(self, history, position_for=None, path=ALERTS_FILE):
+        self.history = history
+        self.position_for = position_for
+        self.path = path
+        self.lock = threading.Lock()
+        self.rules = {}
+        self.by_case = {}
+        self.triggered = deque(maxlen=MAX_TRIGGERED_ALERTS)
+        self.sequence = 0
+        self.listeners = []
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with FILE_IO_SECONDS.time(store="alerts", operation="load"), open(self.path, "r") as f:
+                rules = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load {self.path}: {e}. Starting with no alert rules.")
+            return
+        for rule in rules:
+            self._index(rule)
+
+    def _save(self):
+        tmp_file = self.path + ".tmp"
+        with FILE_IO_SECONDS.time(store="alerts", operation="save"), open(tmp_file, "w") as f:
+            json.dump(list(self.rules.values()), f, indent=4)
+        os.replace(tmp_file, self.path)
+
+    def _index(self, rule):
+        self.rules[rule["id"]] = rule
+        self.by_case.setdefault(rule["case"], {})[rule["id"]] = rule
+
+    def list_rules(self):
+        with self.lock:
+            return [dict(rule) for rule in self.rules.values()]
+
+    def add_rule(self, case, kind, threshold, portfolio="default"):
+        if case not in CATALOG:
+            raise ValueError(f"Unknown case: {case}")
+        if kind not in RULE_KINDS:
+            raise ValueError(f"Unsupported rule kind: {kind}")
+        try:
+            threshold = float(threshold)
+        except (TypeError, ValueError):
+            raise ValueError("threshold must be a number")
+        if not math.isfinite(threshold):
+            raise ValueError("threshold must be a finite number")
+        rule = {
+            "id": uuid.uuid4().hex[:12],
+            "case": case,
+            "kind": kind,
+            "threshold": threshold,
+            "portfolio": portfolio if kind in POSITION_KINDS else None,
+            "active": False,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "last_triggered": None
+        }
+        with self.lock:
+            self._index(rule)
+            self._save()
+        return dict(rule)
+
+    def remove_rule(self, rule_id):
+        with self.lock:
+            rule = self.rules.pop(rule_id, None)
+            if rule is None:
+                return False
+            case_rules = self.by_case.get(rule["case"], {})
+            case_rules.pop(rule_id, None)
+            if not case_rules:
+                self.by_case.pop(rule["case"], None)
+            self._save()
+        return True
+
+    def triggered_since(self, sequence=0):
+        with self.lock:
+            return [dict(alert) for alert in self.triggered if alert["seq"] > sequence], self.sequence
+
+    def _value(self, rule, price):
+        if rule["kind"] in PRICE_KINDS:
+            return price
+        if rule["kind"] in POSITION_KINDS:
+            position = self.position_for(rule["portfolio"], rule["case"]) if self.position_for else None
+            if position is None:
+                return UNAVAILABLE
+            if position["quantity"] <= 0 or position["cost_value"] <= 0:
+                return None
+            return (position["quantity"] * price - position["cost_value"]) / position["cost_value"] * 100
+        previous = self.history.price_before(rule["case"], datetime.now().strftime("%Y-%m-%d"))
+        if not previous:
+            return None
+        return abs(price - previous) / previous * 100
+
+    def _matches(self, rule, value):
+        if rule["kind"] in ("price_below", "pl_below_pct"):
+            return value < rule["threshold"]
+        if rule["kind"] == "daily_change_pct":
+            return value >= rule["threshold"]
+        return value > rule["threshold"]
+
+    def on_price(self, case, info):
+        # Registered as a scraper price listener.
+        if info is None or info["price"] is None:
+            return
+        with self.lock:
+            rules = list(self.by_case.get(case, {}).values())
+        if not rules:
+            return
+
+        fired = []
+        changed = False
+        for rule in rules:
+            value = self._value(rule, info["price"])
+            if value is UNAVAILABLE:
+                continue
+            matched = value is not None and self._matches(rule, value)
+            ALERT_EVALUATIONS.inc(result="matched" if matched else "clear")
+            with self.lock:
+                # Compare-and-set under the lock: two evaluations of the same case racing here
+                # (a refresh and a newly created rule, say) must not both fire the edge.
+                if matched == rule["active"]:
+                    continue
+                changed = True
+                rule["active"] = matched
+                if matched:
+                    rule["last_triggered"] = datetime.now().isoformat(timespec="seconds")
+                    self.sequence += 1
+                    alert = {
+                        "seq": self.sequence,
+                        "rule_id": rule["id"],
+                        "case": case,
+                        "kind": rule["kind"],
+                        "threshold": rule["threshold"],
+                        "value": round(value, 4),
+                        "price": info["price"],
+                        "message": describe(rule),
+                        "triggered": rule["last_triggered"]
+                    }
+                    self.triggered.append(alert)
+                    fired.append(alert)
+        if changed:
+            with self.lock:
+                self._save()
+
+        for alert in fired:
+            logger.info(f"Alert triggered: {alert['message']} (now {alert['value']:g})")
+            for listener in self.listeners:
+                try:
+                    listener(alert)
+                except Exception as e:
+                    logger.error(f"Alert listener failed for {alert['rule_id']}: {e}")
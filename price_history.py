@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+PRICE_HISTORY_DB = "price_history.db"
+LEGACY_HISTORY_FILE = "price_history.json"
+
+# SQL expression mapping a point's date to the first day of its bucket (weeks start on Monday).
+BUCKET_KEYS = {
+    "day": "date",
+    "week": "date(date, '-6 days', 'weekday 1')",
+    "month": "strftime('%Y-%m-01', date)"
+}
+
+
+class PriceHistoryStore:
+    def __init__(self, path=PRICE_HISTORY_DB, legacy_file=LEGACY_HISTORY_FILE):
+        self.path = path
+        self.legacy_file = legacy_file
+        self.lock = threading.Lock()
+        self.conn = None
+        self.latest = {}
+        self._revision = 0
+        self.bucket_cache = {}
+
+    def _ensure_open(self):
+        # The database is opened (and the legacy file migrated) on first use rather than at
+        # construction, which keeps sqlite and the latest-point scan off the startup path.
+        if self.conn is not None:
+            return
+        with self.lock:
+            if self.conn is not None:
+                return
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._create_schema(conn)
+            self._migrate_legacy(conn, self.legacy_file)
+            self.latest = self._load_latest(conn)
+            self._revision = self._get_meta(conn, "revision", 0)
+            self.conn = conn
+
+    @property
+    def revision(self):
+        self._ensure_open()
+        return self._revision
+
+    def _create_schema(self, conn):
+        with conn:
+            # (case_name, date) is the primary key, so one point per case per day and every
+            # range/latest lookup is an index seek instead of a scan.
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS price_points ("
+                "case_name TEXT NOT NULL, date TEXT NOT NULL, price REAL NOT NULL, "
+                "PRIMARY KEY (case_name, date)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _get_meta(self, conn, key, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, conn, key, value):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value))
+        )
+
+    def _migrate_legacy(self, conn, legacy_file):
+        if not legacy_file or not os.path.exists(legacy_file) or self._get_meta(conn, "legacy_migrated", False):
+            return
+        try:
+            with open(legacy_file, "r") as f:
+                history = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load legacy price history for migration: {e}")
+            return
+
+        rows = {}
+        for case_name, points in history.items():
+            for point in points:
+                # Later points for the same day win, matching what /price_history used to report.
+                rows[(case_name, point["date"][:10])] = float(point["price"])
+
+        with conn:
+            conn.executemany(
+                "INSERT INTO price_points (case_name, date, price) VALUES (?, ?, ?) "
+                "ON CONFLICT(case_name, date) DO UPDATE SET price = excluded.price",
+                [(case_name, date, price) for (case_name, date), price in rows.items()]
+            )
+            self._set_meta(conn, "legacy_migrated", True)
+        os.replace(legacy_file, legacy_file + ".migrated")
+        logger.info(f"Migrated {len(rows)} price points from {legacy_file}")
+
+    def _load_latest(self, conn):
+        rows = conn.execute(
+            "SELECT case_name, date, price FROM price_points AS p "
+            "WHERE date = (SELECT MAX(date) FROM price_points WHERE case_name = p.case_name)"
+        ).fetchall()
+        return {case_name: {"date": date, "price": price} for case_name, date, price in rows}
+
+    def append(self, prices, date=None):
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        rows = [(case_name, date, price) for case_name, price in prices.items() if price is not None]
+        if not rows:
+            return 0
+        self._ensure_open()
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO price_points (case_name, date, price) VALUES (?, ?, ?) "
+                    "ON CONFLICT(case_name, date) DO UPDATE SET price = excluded.price",
+                    rows
+                )
+                self._revision += 1
+                self._set_meta(self.conn, "revision", self._revision)
+            for case_name, point_date, price in rows:
+                self._invalidate_buckets(case_name, point_date)
+                latest = self.latest.get(case_name)
+                if latest is None or point_date >= latest["date"]:
+                    self.latest[case_name] = {"date": point_date, "price": price}
+        return len(rows)
+
+    def latest_price(self, case_name):
+        self._ensure_open()
+        with self.lock:
+            latest = self.latest.get(case_name)
+        return latest["price"] if latest else None
+
+    def latest_prices(self):
+        # append() adds keys under the lock, so the dict is copied under it before iterating.
+        self._ensure_open()
+        with self.lock:
+            latest = dict(self.latest)
+        return {case_name: point["price"] for case_name, point in latest.items()}
+
+    def price_before(self, case_name, date):
+        # Last stored price strictly before date; a single seek on the (case_name, date) key.
+        self._ensure_open()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT price FROM price_points WHERE case_name = ? AND date < ? ORDER BY date DESC LIMIT 1",
+                (case_name, date)
+            ).fetchone()
+        return row[0] if row else None
+
+    def range(self, case_name, start=None, end=None):
+        query = "SELECT date, price FROM price_points WHERE case_name = ?"
+        params = [case_name]
+        if start:
+            query += " AND date >= ?"
+            params.append(start)
+        if end:
+            query += " AND date <= ?"
+            params.append(end)
+        query += " ORDER BY date"
+        self._ensure_open()
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [{"date": date, "price": price} for date, price in rows]
+
+    def bucket_start(self, bucket, date):
+        day = datetime.strptime(date[:10], "%Y-%m-%d")
+        if bucket == "week":
+            day -= timedelta(days=day.weekday())
+        elif bucket == "month":
+            day = day.replace(day=1)
+        return day.strftime("%Y-%m-%d")
+
+    def _invalidate_buckets(self, case_name, date):
+        # Closed buckets only change if a point is back-filled into them.
+        for key in [key for key in self.bucket_cache if key[1] == case_name]:
+            if date < self.bucket_cache[key][0]:
+                del self.bucket_cache[key]
+
+    def _aggregate_rows(self, case_name, bucket, start=None, before=None):
+        self._ensure_open()
+        with self.lock:
+            return self._query_buckets(case_name, bucket, start, before)
+
+    def _query_buckets(self, case_name, bucket, start=None, before=None):
+        # Caller holds self.lock.
+        where = "case_name = ?"
+        params = [case_name]
+        if start:
+            where += " AND date >= ?"
+            params.append(start)
+        if before:
+            where += " AND date < ?"
+            params.append(before)
+        query = (
+            f"WITH agg AS (SELECT {BUCKET_KEYS[bucket]} AS bucket, MIN(date) AS first_date, MAX(date) AS last_date, "
+            f"MIN(price) AS low, MAX(price) AS high, AVG(price) AS mean, COUNT(*) AS points "
+            f"FROM price_points WHERE {where} GROUP BY bucket) "
+            "SELECT agg.bucket, o.price, agg.high, agg.low, c.price, agg.mean, agg.points FROM agg "
+            "JOIN price_points AS o ON o.case_name = ? AND o.date = agg.first_date "
+            "JOIN price_points AS c ON c.case_name = ? AND c.date = agg.last_date "
+            "ORDER BY agg.bucket"
+        )
+        rows = self.conn.execute(query, params + [case_name, case_name]).fetchall()
+        return [
+            {"bucket": key, "open": open_, "high": high, "low": low, "close": close, "mean": round(mean, 4), "points": points}
+            for key, open_, high, low, close, mean, points in rows
+        ]
+
+    def aggregate(self, case_names, bucket="day", start=None, end=None):
+        if bucket not in BUCKET_KEYS:
+            raise ValueError(f"Unsupported bucket size: {bucket}")
+        current = self.bucket_start(bucket, datetime.now().strftime("%Y-%m-%d"))
+        first = self.bucket_start(bucket, start) if start else None
+        series = {}
+        self._ensure_open()
+        for case_name in case_names:
+            # Every bucket before the current one is immutable, so it is computed once and
+            # reused; only the open bucket is re-aggregated per call. The lookup, query and store
+            # happen under one lock so a back-fill in append() cannot land between the query and
+            # the store and leave a stale entry behind.
+            with self.lock:
+                cached = self.bucket_cache.get((bucket, case_name))
+                if cached is None or cached[0] != current:
+                    cached = (current, self._query_buckets(case_name, bucket, before=current))
+                    self.bucket_cache[(bucket, case_name)] = cached
+            rows = cached[1] + self._aggregate_rows(case_name, bucket, start=current)
+            series[case_name] = [
+                row for row in rows
+                if (first is None or row["bucket"] >= first) and (end is None or row["bucket"] <= end)
+            ]
+        return series
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
@@ -0,0 +1,114 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL = 15 * 60
+MAX_TRACKED_JOBS = 50
+
+
+class PriceRefresher:
+    def __init__(self, scraper, case_names, on_refresh=None, interval=DEFAULT_REFRESH_INTERVAL):
+        self.scraper = scraper
+        self.case_names = case_names
+        self.on_refresh = on_refresh
+        self.interval = interval
+        self.jobs = OrderedDict()
+        self.pending = []
+        self.current_job = None
+        self.condition = threading.Condition()
+        self.thread = None
+        self.stopped = False
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.condition:
+            self.stopped = False
+            # Catch up on anything that went stale while the app was down instead of waiting a
+            # full interval; only stale cases are fetched, so a warm cache costs nothing.
+            self.pending.append(self._new_job(self.case_names, False, "startup"))
+        self.thread = threading.Thread(target=self._run, name="price-refresher", daemon=True)
+        self.thread.start()
+        logger.info(f"Background price refresher started (interval {self.interval}s)")
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def is_refreshing(self):
+        with self.condition:
+            return self.current_job is not None or bool(self.pending)
+
+    def _new_job(self, names, force, trigger):
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "status": "queued",
+            "trigger": trigger,
+            "cases": list(names),
+            "force": force,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "finished": None,
+            "fetch_status": {}
+        }
+        self.jobs[job["id"]] = job
+        while len(self.jobs) > MAX_TRACKED_JOBS:
+            self.jobs.popitem(last=False)
+        return job
+
+    def kick(self, names=None, force=False):
+        names = list(names) if names is not None else list(self.case_names)
+        with self.condition:
+            # Coalesce repeated clicks onto a job that has not started yet.
+            for job in self.pending:
+                if job["force"] == force and set(names) <= set(job["cases"]):
+                    return dict(job)
+            job = self._new_job(names, force, "manual")
+            self.pending.append(job)
+            self.condition.notify_all()
+            return dict(job)
+
+    def get_job(self, job_id):
+        with self.condition:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _next_job(self):
+        with self.condition:
+            if not self.pending and not self.stopped:
+                self.condition.wait(timeout=self.interval)
+            if self.stopped:
+                return None
+            if self.pending:
+                job = self.pending.pop(0)
+            else:
+                job = self._new_job(self.case_names, False, "scheduled")
+            job["status"] = "running"
+            self.current_job = job
+            return job
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            ok = False
+            try:
+                if job["trigger"] in ("scheduled", "startup") and not self.scraper.api_key:
+                    ok = True
+                else:
+                    ok = self.scraper.fetch_prices(job["cases"], only_stale=not job["force"])
+                    job["fetch_status"] = dict(self.scraper.fetch_status)
+                    if ok and self.on_refresh is not None:
+                        self.on_refresh(job)
+            except Exception as e:
+                logger.error(f"Background price refresh {job['id']} failed: {e}")
+            with self.condition:
+                job["status"] = "done" if ok else "failed"
+                job["finished"] = datetime.now().isoformat(timespec="seconds")
+                self.current_job = None
+        logger.info("Background price refresher stopped")
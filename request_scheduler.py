@@ -0,0 +1,129 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from metrics import CSFLOAT_REQUESTS, CSFLOAT_REQUEST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 5
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 30.0
+DEFAULT_TIMEOUT = 10
+# Set to a number of seconds to only pace requests for that long after a 429 (opt-in);
+# None paces every request at the configured rate.
+DEFAULT_THROTTLE_WINDOW = None
+
+
+class TokenBucket:
+    # With a throttle_window the bucket only paces requests for that long after a 429;
+    # until the API has pushed back, requests go out as fast as the workers issue them.
+    # Without one it always paces.
+    def __init__(self, rate, capacity, throttle_window=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttle_window = throttle_window
+        self.throttled_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.throttle_window is not None and now >= self.throttled_until:
+                    return
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        # A 429 applies to the whole API key, so every worker has to back off, not just the one that hit it.
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.blocked_until
+            if self.throttle_window is not None:
+                self.throttled_until = max(self.throttled_until, self.blocked_until + self.throttle_window)
+
+
+class RequestScheduler:
+    def __init__(self, session, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP, timeout=DEFAULT_TIMEOUT,
+                 throttle_window=DEFAULT_THROTTLE_WINDOW):
+        self.session = session
+        self.bucket = TokenBucket(rate, burst, throttle_window)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _retry_after(self, response):
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                CSFLOAT_REQUESTS.inc(status="network_error")
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"Request to {url} failed ({e}), retrying in {delay:.2f}s")
+            else:
+                CSFLOAT_REQUEST_SECONDS.observe(time.perf_counter() - start)
+                CSFLOAT_REQUESTS.inc(status=response.status_code)
+                if response.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response
+                retry_after = self._retry_after(response)
+                if retry_after is not None and retry_after > self.backoff_cap:
+                    # Waiting that long would stall every worker and the refresher thread, so the
+                    # request fails instead; the bucket keeps pacing the others.
+                    logger.warning(f"Request to {url} returned {response.status_code} with Retry-After {retry_after:.0f}s, giving up")
+                    response.raise_for_status()
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                if response.status_code == 429:
+                    self.bucket.pause(delay)
+                logger.warning(f"Request to {url} returned {response.status_code}, retrying in {delay:.2f}s")
+            attempt += 1
+            time.sleep(delay)
@@ -3,13 +3,19 @@ document.addEventListener('DOMContentLoaded', () => {
     if (initialDataElement) {
         const initialData = JSON.parse(initialDataElement.textContent || '{}');
         window.investments = initialData.investments || [];
+        window.portfolioRevision = initialData.revision || 0;
+        window.portfolioId = initialData.portfolio_id || 'default';
+        window.apiBase = initialData.api_base || '';
         window.caseNames = initialData.case_names || [];
         window.releaseYears = initialData.release_years || {};
         window.releaseDates = initialData.release_dates || {};
+        window.imageVersions = initialData.image_versions || {};
 
         loadInvestments();
         setupEventListeners();
         setupApiKeyListener();
+        connectEvents();
+        reportFirstPaint();
 
         fetch('/price_history')
             .then(res => res.json())
@@ -26,6 +32,85 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 });
 
+function apiUrl(path) {
+    // Portfolio-scoped routes live under /portfolios/<id>; the default portfolio keeps the bare paths.
+    return window.apiBase + path;
+}
+
+function caseImageUrl(name) {
+    // Fingerprinted URLs are served with a long max-age, so images are only re-downloaded when they change.
+    const file = `${name.toLowerCase().replace(/ /g, '_')}.webp`;
+    const version = window.imageVersions[file];
+    return `/static/images/${file}` + (version ? `?v=${version}` : '');
+}
+
+function reportFirstPaint() {
+    if (!window.performance || !performance.getEntriesByType) {
+        return;
+    }
+    // Paint entries are only recorded once the first frame is on screen.
+    requestAnimationFrame(() => setTimeout(() => {
+        const paint = performance.getEntriesByType('paint').find(entry => entry.name === 'first-contentful-paint')
+            || performance.getEntriesByType('paint')[0];
+        if (!paint) {
+            return;
+        }
+        fetch('/startup_metrics', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ first_paint_ms: paint.startTime })
+        }).catch(err => console.error('Startup metrics error:', err));
+    }, 0));
+}
+
+function connectEvents() {
+    if (!window.EventSource) {
+        return;
+    }
+    const source = new EventSource(apiUrl('/events'));
+    source.addEventListener('open', () => { window.eventsConnected = true; });
+    source.addEventListener('error', () => { window.eventsConnected = false; });
+    source.addEventListener('price', (e) => {
+        const update = JSON.parse(e.data);
+        updatePriceCard(update.case, update.price, update.stale);
+        const index = window.investments.findIndex(inv => inv.item_name === update.case);
+        if (index !== -1 && update.price !== null) {
+            window.investments[index].lowest_price = update.price;
+            updateCard(index);
+            updateTotals(window.investments);
+        }
+    });
+    source.addEventListener('alert', (e) => showAlert(JSON.parse(e.data)));
+    source.addEventListener('portfolio', (e) => {
+        const update = JSON.parse(e.data);
+        if (update.revision > window.portfolioRevision) {
+            syncPortfolio();
+        }
+    });
+}
+
+function showAlert(alert) {
+    if (window.Notification && Notification.permission === 'granted') {
+        new Notification('Case Collector', { body: alert.message });
+    } else if (window.Notification && Notification.permission !== 'denied') {
+        Notification.requestPermission();
+        console.info('Alert:', alert.message);
+    } else {
+        console.info('Alert:', alert.message);
+    }
+}
+
+function syncPortfolio() {
+    fetch(apiUrl('/portfolio'), { headers: portfolioHeaders({}) })
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success') {
+            applyPortfolioResponse(data);
+        }
+    })
+    .catch(error => console.error('Error syncing portfolio:', error));
+}
+
 function setupEventListeners() {
     const addBtn = document.querySelector('.add-btn');
     if (addBtn) {
@@ -119,6 +204,46 @@ function saveApiKey() {
     });
 }
 
+function portfolioHeaders(headers) {
+    return { ...headers, 'X-Portfolio-Revision': String(window.portfolioRevision) };
+}
+
+function applyPortfolioResponse(data) {
+    if (data.revision !== undefined) {
+        window.portfolioRevision = data.revision;
+    }
+    if (data.investments) {
+        window.investments = data.investments;
+        loadInvestments();
+        return;
+    }
+    const changes = data.changes;
+    if (!changes) {
+        return;
+    }
+
+    const byName = new Map(window.investments.map(inv => [inv.item_name, inv]));
+    changes.removed.forEach(name => byName.delete(name));
+    const changedIndexes = [];
+    changes.changed.forEach(inv => {
+        if (byName.has(inv.item_name) && !changes.order) {
+            const index = window.investments.findIndex(existing => existing.item_name === inv.item_name);
+            window.investments[index] = inv;
+            changedIndexes.push(index);
+        }
+        byName.set(inv.item_name, inv);
+    });
+
+    if (changes.order) {
+        // Membership or order changed, so indices shift and every card is re-rendered.
+        window.investments = changes.order.map(name => byName.get(name)).filter(Boolean);
+        loadInvestments();
+    } else {
+        changedIndexes.forEach(updateCard);
+        updateTotals(window.investments);
+    }
+}
+
 function loadInvestments() {
     renderCards(window.investments);
     updateTotals(window.investments);
@@ -133,138 +258,155 @@ function renderCards(investments) {
             return;
         }
         investments.forEach((inv, index) => {
-            const profitLoss = inv.lowest_price !== null ? inv.quantity * (inv.lowest_price - inv.purchase_price) : 0;
-            const roi = inv.lowest_price !== null && inv.purchase_price !== 0 ? ((inv.lowest_price - inv.purchase_price) / inv.purchase_price * 100).toFixed(2) : 0;
-            const dropStatus = getDropStatus(inv.item_name);
-            const card = document.createElement('div');
-            card.className = 'card';
-            card.dataset.index = index;
-            card.draggable = true;
-            card.innerHTML = `
-                <div class="card-front">
-                    <div class="card-header">
-                        <img src="/static/images/${inv.item_name.toLowerCase().replace(/ /g, '_')}.webp" alt="${inv.item_name}" onerror="this.src='data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAACklEQVR4nGMAAQAABQABDQottAAAAABJRU5ErkJggg=='">
-                        <span>${inv.item_name} (${window.releaseYears[inv.item_name] || 'N/A'})</span>
-                        <button class="remove-btn" onclick="showConfirmRemoveModal(${index})">X</button>
+            container.appendChild(createCard(inv, index));
+        });
+    } else {
+        console.error('Cards container not found');
+    }
+}
+
+function updateCard(index) {
+    const existing = document.querySelector(`#cards-container .card[data-index="${index}"]`);
+    if (existing) {
+        const card = createCard(window.investments[index], index);
+        if (existing.classList.contains('flipped')) {
+            card.classList.add('flipped');
+        }
+        existing.replaceWith(card);
+    }
+}
+
+function createCard(inv, index) {
+    const profitLoss = inv.lowest_price !== null ? inv.quantity * (inv.lowest_price - inv.purchase_price) : 0;
+    const roi = inv.lowest_price !== null && inv.purchase_price !== 0 ? ((inv.lowest_price - inv.purchase_price) / inv.purchase_price * 100).toFixed(2) : 0;
+    const dropStatus = getDropStatus(inv.item_name);
+    const card = document.createElement('div');
+    card.className = 'card';
+    card.dataset.index = index;
+    card.draggable = true;
+    card.innerHTML = `
+        <div class="card-front">
+            <div class="card-header">
+                <img src="${caseImageUrl(inv.item_name)}" alt="${inv.item_name}" onerror="this.src='data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAACklEQVR4nGMAAQAABQABDQottAAAAABJRU5ErkJggg=='">
+                <span>${inv.item_name} (${window.releaseYears[inv.item_name] || 'N/A'})</span>
+                <button class="remove-btn" onclick="showConfirmRemoveModal(${index})">X</button>
+            </div>
+            <div class="card-content">
+                <div class="split-container">
+                    <div class="left-section">
+                        <div><h4>Your Investment</h4></div>
+                        <div class="input-group">
+                            <span>Qty:</span>
+                            <span class="static-value"><b>${inv.quantity}</b></span>
+                            <button class="adjust-btn" onclick="showTransactionModal(${index}, 'buy')">+</button>
+                            <button class="adjust-btn minus-btn" onclick="showTransactionModal(${index}, 'sell')">-</button>
+                        </div>
+                        <div class="input-group">
+                            <span>Per Case:</span>
+                            <span class="static-value"><b>$${inv.purchase_price.toFixed(2)}</b></span>
+                        </div>
+                        <div class="value-box">
+                            Total: $${(inv.quantity * inv.purchase_price).toFixed(2)}
+                        </div>
                     </div>
-                    <div class="card-content">
-                        <div class="split-container">
-                            <div class="left-section">
-                                <div><h4>Your Investment</h4></div>
-                                <div class="input-group">
-                                    <span>Qty:</span>
-                                    <span class="static-value"><b>${inv.quantity}</b></span>
-                                    <button class="adjust-btn" onclick="showTransactionModal(${index}, 'buy')">+</button>
-                                    <button class="adjust-btn minus-btn" onclick="showTransactionModal(${index}, 'sell')">-</button>
-                                </div>
-                                <div class="input-group">
-                                    <span>Per Case:</span>
-                                    <span class="static-value"><b>$${inv.purchase_price.toFixed(2)}</b></span>
-                                </div>
-                                <div class="value-box">
-                                    Total: $${(inv.quantity * inv.purchase_price).toFixed(2)}
-                                </div>
-                            </div>
-                            <div class="right-section">
-                                <div><h4>Current Value</h4></div>
-                                <div class="value-box">
-                                    Case Price: $${inv.lowest_price !== null ? inv.lowest_price.toFixed(2) : '0.00'}
-                                </div>
-                                <div class="profit-loss" style="color: ${profitLoss >= 0 ? 'rgb(76, 145, 76)' : 'rgb(126, 33, 33)'}">
-                                    ${profitLoss > 0 ? 'Profit:' : profitLoss < 0 ? 'Loss:' : 'Profit/Loss:'} $${profitLoss.toFixed(2)}
-                                </div>
-                                <div class="value-box">
-                                    Total: $${inv.lowest_price !== null ? (inv.quantity * inv.lowest_price).toFixed(2) : '0.00'}
-                                </div>
-                            </div>
+                    <div class="right-section">
+                        <div><h4>Current Value</h4></div>
+                        <div class="value-box">
+                            Case Price: $${inv.lowest_price !== null ? inv.lowest_price.toFixed(2) : '0.00'}
+                        </div>
+                        <div class="profit-loss" style="color: ${profitLoss >= 0 ? 'rgb(76, 145, 76)' : 'rgb(126, 33, 33)'}">
+                            ${profitLoss > 0 ? 'Profit:' : profitLoss < 0 ? 'Loss:' : 'Profit/Loss:'} $${profitLoss.toFixed(2)}
                         </div>
-                        <div class="card-footer">
-                            <span class="drop-status"><b>[${dropStatus}]</b></span>
-                            <span class="roi">ROI: <b>${roi}%</b></span>
+                        <div class="value-box">
+                            Total: $${inv.lowest_price !== null ? (inv.quantity * inv.lowest_price).toFixed(2) : '0.00'}
                         </div>
                     </div>
                 </div>
-                <div class="card-back">
-                    <div class="ledger-container ${inv.transactions && inv.transactions.length > 8 ? 'scrollable' : ''}">
-                        ${renderLedger(inv.transactions || [])}
-                    </div>
+                <div class="card-footer">
+                    <span class="drop-status"><b>[${dropStatus}]</b></span>
+                    <span class="roi">ROI: <b>${roi}%</b></span>
                 </div>
-            `;
-            const valueBoxInvestment = card.querySelector('.left-section .value-box');
-            const valueBoxTotalValue = card.querySelectorAll('.right-section .value-box')[1];
-            if (inv.lowest_price !== null) {
-                const pl = inv.quantity * (inv.lowest_price - inv.purchase_price);
-                valueBoxInvestment.style.backgroundColor = '#2a2a2a';
-                valueBoxTotalValue.style.backgroundColor = pl >= 0 ? 'rgb(76, 145, 76)' : 'rgb(126, 33, 33)';
-            }
-
-            card.addEventListener('click', (e) => {
-                if (!e.target.closest('button') && !e.target.closest('input')) {
-                    card.classList.toggle('flipped');
-                    const ledgerContainer = card.querySelector('.ledger-container');
-                    if (ledgerContainer && ledgerContainer.classList.contains('scrollable')) {
-                        ledgerContainer.scrollTop = ledgerContainer.scrollHeight;
-                    }
-                }
-            });
-
-            card.addEventListener('mouseenter', (e) => {
-                if (card.classList.contains('flipped')) {
-                    document.body.classList.add('no-scroll');
-                }
-            });
-
-            card.addEventListener('mouseleave', (e) => {
-                if (card.classList.contains('flipped') && !card.contains(e.relatedTarget)) {
-                    document.body.classList.remove('no-scroll');
-                }
-            });
+            </div>
+        </div>
+        <div class="card-back">
+            <div class="ledger-container ${inv.transactions && inv.transactions.length > 8 ? 'scrollable' : ''}">
+                ${renderLedger(inv.transactions || [])}
+            </div>
+        </div>
+    `;
+    const valueBoxInvestment = card.querySelector('.left-section .value-box');
+    const valueBoxTotalValue = card.querySelectorAll('.right-section .value-box')[1];
+    if (inv.lowest_price !== null) {
+        const pl = inv.quantity * (inv.lowest_price - inv.purchase_price);
+        valueBoxInvestment.style.backgroundColor = '#2a2a2a';
+        valueBoxTotalValue.style.backgroundColor = pl >= 0 ? 'rgb(76, 145, 76)' : 'rgb(126, 33, 33)';
+    }
 
+    card.addEventListener('click', (e) => {
+        if (!e.target.closest('button') && !e.target.closest('input')) {
+            card.classList.toggle('flipped');
             const ledgerContainer = card.querySelector('.ledger-container');
             if (ledgerContainer && ledgerContainer.classList.contains('scrollable')) {
-                ledgerContainer.addEventListener('wheel', (e) => {
-                    e.preventDefault();
-                    const scrollAmount = e.deltaY * 0.5;
-                    ledgerContainer.scrollTop += scrollAmount;
-                }, { passive: false });
+                ledgerContainer.scrollTop = ledgerContainer.scrollHeight;
             }
+        }
+    });
 
-            const caseImage = card.querySelector('.card-header img');
-            card.addEventListener('dragstart', (e) => {
-                if (e.target === caseImage) {
-                    e.dataTransfer.setData('text/plain', index);
-                    card.classList.add('dragging');
-                } else {
-                    e.preventDefault();
-                }
-            });
+    card.addEventListener('mouseenter', (e) => {
+        if (card.classList.contains('flipped')) {
+            document.body.classList.add('no-scroll');
+        }
+    });
 
-            card.addEventListener('dragend', () => {
-                card.classList.remove('dragging');
-            });
+    card.addEventListener('mouseleave', (e) => {
+        if (card.classList.contains('flipped') && !card.contains(e.relatedTarget)) {
+            document.body.classList.remove('no-scroll');
+        }
+    });
 
-            card.addEventListener('dragover', (e) => {
-                e.preventDefault();
-            });
+    const ledgerContainer = card.querySelector('.ledger-container');
+    if (ledgerContainer && ledgerContainer.classList.contains('scrollable')) {
+        ledgerContainer.addEventListener('wheel', (e) => {
+            e.preventDefault();
+            const scrollAmount = e.deltaY * 0.5;
+            ledgerContainer.scrollTop += scrollAmount;
+        }, { passive: false });
+    }
 
-            card.addEventListener('drop', (e) => {
-                e.preventDefault();
-                const draggedIndex = parseInt(e.dataTransfer.getData('text/plain'));
-                const targetIndex = parseInt(card.dataset.index);
-                if (draggedIndex !== targetIndex) {
-                    reorderInvestments(draggedIndex, targetIndex);
-                }
-            });
+    const caseImage = card.querySelector('.card-header img');
+    card.addEventListener('dragstart', (e) => {
+        if (e.target === caseImage) {
+            e.dataTransfer.setData('text/plain', index);
+            card.classList.add('dragging');
+        } else {
+            e.preventDefault();
+        }
+    });
 
-            container.appendChild(card);
-        });
-    } else {
-        console.error('Cards container not found');
-    }
+    card.addEventListener('dragend', () => {
+        card.classList.remove('dragging');
+    });
+
+    card.addEventListener('dragover', (e) => {
+        e.preventDefault();
+    });
+
+    card.addEventListener('drop', (e) => {
+        e.preventDefault();
+        const draggedIndex = parseInt(e.dataTransfer.getData('text/plain'));
+        const targetIndex = parseInt(card.dataset.index);
+        if (draggedIndex !== targetIndex) {
+            reorderInvestments(draggedIndex, targetIndex);
+        }
+    });
+
+    return card;
 }
 
 function renderLedger(transactions) {
     const MIN_ROWS = 8;
+    // Manual position adjustments are kept in the ledger for replay but are not trades.
+    transactions = (transactions || []).filter(t => t.type === 'buy' || t.type === 'sell');
     if (!transactions || transactions.length === 0) {
         const emptyRows = Array(MIN_ROWS).fill(`
             <tr>
@@ -429,7 +571,7 @@ function showCaseSelector() {
             const caseItem = document.createElement('div');
             caseItem.className = `case-item ${isAdded ? 'disabled' : ''}`;
             caseItem.innerHTML = `
-                <img src="/static/images/${caseName.toLowerCase().replace(/ /g, '_')}.webp" alt="${caseName}" class="case-image" onerror="this.src='data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAACklEQVR4nGMAAQAABQABDQottAAAAABJRU5ErkJggg=='">
+                <img src="${caseImageUrl(caseName)}" alt="${caseName}" class="case-image" onerror="this.src='data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAACklEQVR4nGMAAQAABQABDQottAAAAABJRU5ErkJggg=='">
                 <div class="case-info">
                     <span>${caseName}</span>
                     <div class="release-date">${window.releaseDates[caseName] || 'N/A'}</div>
@@ -468,16 +610,15 @@ function addCaseWithDetails(event, caseName) {
         return;
     }
 
-    fetch('/add_case', {
+    fetch(apiUrl('/add_case'), {
         method: 'POST',
-        headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        headers: portfolioHeaders({ 'Content-Type': 'application/x-www-form-urlencoded' }),
         body: `case=${encodeURIComponent(caseName)}&qty=${qty}&price=${price}`
     })
     .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
-            window.investments = data.investments || window.investments;
-            loadInvestments();
+            applyPortfolioResponse(data);
             hideCaseSelector();
         }
     })
@@ -516,17 +657,18 @@ function submitTransaction(index, type) {
         return;
     }
 
-    fetch('/add_transaction', {
+    fetch(apiUrl('/add_transaction'), {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: portfolioHeaders({ 'Content-Type': 'application/json' }),
         body: JSON.stringify({ index, type, quantity: qty, price })
     })
     .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
-            window.investments = data.investments || window.investments;
-            loadInvestments();
+            applyPortfolioResponse(data);
             modal.remove();
+        } else if (data.message) {
+            alert(data.message);
         }
     })
     .catch(error => console.error('Error adding transaction:', error));
@@ -561,16 +703,15 @@ function hideConfirmRemoveModal() {
 
 function confirmRemoveCase() {
     if (removeIndex !== null) {
-        fetch('/remove_case', {
+        fetch(apiUrl('/remove_case'), {
             method: 'POST',
-            headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+            headers: portfolioHeaders({ 'Content-Type': 'application/x-www-form-urlencoded' }),
             body: `index=${removeIndex}`
         })
         .then(response => response.json())
         .then(data => {
             if (data.status === 'success') {
-                window.investments = data.investments || window.investments;
-                loadInvestments();
+                applyPortfolioResponse(data);
                 hideConfirmRemoveModal();
             }
         })
@@ -589,32 +730,30 @@ function updateInvestment(index, field, value) {
         return;
     }
 
-    fetch('/update_investment', {
+    fetch(apiUrl('/update_investment'), {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: portfolioHeaders({ 'Content-Type': 'application/json' }),
         body: JSON.stringify({ index, field, value: parsedValue })
     })
     .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
-            window.investments = data.investments || window.investments;
-            loadInvestments();
+            applyPortfolioResponse(data);
         }
     })
     .catch(error => console.error('Error updating investment:', error));
 }
 
-function refreshPrices() {
-    fetch('/refresh_prices', { method: 'POST' })
+function refreshPrices(force = false) {
+    fetch(apiUrl('/refresh_prices'), {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ scope: 'all', force })
+    })
     .then(response => response.json())
     .then(data => {
-        if (data.status === 'success') {
-            window.investments = data.investments || window.investments;
-            loadInvestments();
-
-            if (data.all_prices) {
-                renderPriceStrip(data.all_prices, window.investments);
-            }
+        if (data.status === 'accepted') {
+            pollRefreshJob(data.job_id);
         } else {
             alert(data.message);
         }
@@ -622,25 +761,68 @@ function refreshPrices() {
     .catch(error => console.error('Error refreshing prices:', error));
 }
 
+function pollRefreshJob(jobId) {
+    fetch(`/refresh_status/${jobId}`)
+    .then(response => response.json())
+    .then(data => {
+        if (data.status !== 'success') {
+            console.error('Failed to read refresh status:', data.message);
+            return;
+        }
+        if (data.job.status === 'queued' || data.job.status === 'running') {
+            setTimeout(() => pollRefreshJob(jobId), 1000);
+            return;
+        }
+        if (data.job.status === 'failed') {
+            alert('Failed to refresh prices');
+        }
+        // With the event stream connected, prices and portfolio changes have already been pushed.
+        if (!window.eventsConnected) {
+            loadPrices();
+        }
+    })
+    .catch(error => console.error('Error polling refresh status:', error));
+}
+
+function loadPrices() {
+    fetch(apiUrl('/prices'))
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'success') {
+            applyPortfolioResponse(data);
+            renderPriceStrip(data.all_prices, window.investments, data.stale);
+        }
+    })
+    .catch(error => console.error('Error loading prices:', error));
+}
+
 function reorderInvestments(fromIndex, toIndex) {
     const movedItem = window.investments.splice(fromIndex, 1)[0];
     window.investments.splice(toIndex, 0, movedItem);
-    fetch('/reorder_investments', {
+    fetch(apiUrl('/reorder_investments'), {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ investments: window.investments })
+        headers: portfolioHeaders({ 'Content-Type': 'application/json' }),
+        body: JSON.stringify({ order: window.investments.map(inv => inv.item_name) })
     })
     .then(response => response.json())
     .then(data => {
         if (data.status === 'success') {
-            window.investments = data.investments || window.investments;
-            loadInvestments();
+            applyPortfolioResponse(data);
         }
     })
     .catch(error => console.error('Error reordering investments:', error));
 }
 
-function renderPriceStrip(allPrices, investments = []) {
+function updatePriceCard(name, price, stale) {
+    const card = Array.from(document.querySelectorAll('#live-price-strip .price-card')).find(el => el.dataset.case === name);
+    if (!card) {
+        return;
+    }
+    card.classList.toggle('stale', Boolean(stale));
+    card.querySelector('.price-card-value').innerHTML = `<b>$${(price ?? 0).toFixed(2)}</b>`;
+}
+
+function renderPriceStrip(allPrices, investments = [], stale = []) {
     const container = document.getElementById('live-price-strip');
     if (!container) {
         console.error("live-price-strip container not found in DOM.");
@@ -652,15 +834,21 @@ function renderPriceStrip(allPrices, investments = []) {
     window.caseNames.forEach(name => {
         const price = allPrices?.[name] ?? 0;
         const el = document.createElement('div');
-        el.className = 'price-card';
+        el.className = stale.includes(name) ? 'price-card stale' : 'price-card';
+        el.dataset.case = name;
         el.innerHTML = `
             <div class="price-card-title">${name}</div>
-            <img class="price-card-image" src="/static/images/${name.toLowerCase().replace(/ /g, '_')}.webp" alt="${name}" onerror="this.src='fallback.png'">
+            <img class="price-card-image" src="${caseImageUrl(name)}" alt="${name}" onerror="this.src='fallback.png'">
             <div class="price-card-value"><b>$${(price).toFixed(2)}</b></div>
         `;
         container.appendChild(el);
     });
 
+    // The strip is re-rendered after every refresh; only start one scroll loop.
+    if (container.dataset.autoScroll) {
+        return;
+    }
+    container.dataset.autoScroll = 'true';
     container.scrollLeft = 5;
 
     let scrollDirection = 1;
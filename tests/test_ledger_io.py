@@ -0,0 +1,112 @@
+import io
+import json
+
+import pytest
+
+from investment_manager import InvestmentStorage, Portfolio
+from ledger_io import import_transactions, read_rows, validate_row
+
+
+def row(**fields):
+    return {"case": "Fever Case", "type": "buy", "quantity": "2", "price_per_case": "1.5", "date": "2024-03-01", **fields}
+
+
+def test_validate_row_normalises_fields():
+    name, kind, quantity, price, date = validate_row(row(type=" Sell ", date="2024-03-01T10:20:30"))
+    assert (name, kind, quantity, price) == ("Fever Case", "sell", 2, 1.5)
+    assert date == "2024-03-01 10:20:30"
+
+
+def test_validate_row_accepts_item_name_and_price_aliases():
+    fields = row(price="3")
+    del fields["case"], fields["price_per_case"]
+    fields["item_name"] = "Gallery Case"
+    assert validate_row(fields)[:4] == ("Gallery Case", "buy", 2, 3.0)
+
+
+def test_validate_row_allows_zero_quantity_adjust_only():
+    assert validate_row(row(type="adjust", quantity="0"))[2] == 0
+    with pytest.raises(ValueError):
+        validate_row(row(quantity="0"))
+
+
+@pytest.mark.parametrize("fields", [
+    {"case": "Not A Case"},
+    {"case": 5},
+    {"case": None},
+    {"type": "gift"},
+    {"quantity": "two"},
+    {"quantity": "-1"},
+    {"quantity": 1e400},
+    {"price_per_case": "-0.5"},
+    {"price_per_case": "nan"},
+    {"price_per_case": "inf"},
+    {"date": "yesterday"},
+])
+def test_validate_row_rejects_bad_fields(fields):
+    with pytest.raises(ValueError):
+        validate_row(row(**fields))
+
+
+def test_validate_row_reraises_parse_errors():
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        validate_row(ValueError("Invalid JSON: x"))
+
+
+def test_read_rows_reports_bad_json_lines_in_place():
+    body = io.BytesIO(b'{"case": "Fever Case"}\nnot json\n\n[1, 2]\n')
+    rows = list(read_rows(body, "jsonl"))
+    assert [line for line, _ in rows] == [1, 2, 4]
+    assert isinstance(rows[0][1], dict)
+    assert all(isinstance(item, ValueError) for _, item in rows[1:])
+
+
+def make_portfolio(tmp_path):
+    return Portfolio([], storage=InvestmentStorage(str(tmp_path / "portfolio.json")))
+
+
+def jsonl(*rows):
+    return list(read_rows(io.BytesIO("".join(json.dumps(item) + "\n" for item in rows).encode()), "jsonl"))
+
+
+def test_import_applies_rows_with_one_save(tmp_path, monkeypatch):
+    portfolio = make_portfolio(tmp_path)
+    saves = []
+    save = portfolio.storage.save
+    monkeypatch.setattr(portfolio.storage, "save", lambda investments, durable=True: saves.append(durable) or save(investments, durable))
+    result = import_transactions(portfolio, jsonl(
+        row(quantity=3),
+        row(type="sell", quantity=1, price_per_case=4),
+        row(case="Gallery Case", type="adjust", quantity=2, price_per_case=1)
+    ), price_for={"Fever Case": 2.5}.get)
+
+    assert result["imported"] == 3
+    assert saves == [True]
+    assert result["created"] == ["Fever Case", "Gallery Case"]
+    fever = portfolio.investments[portfolio.find("Fever Case")]
+    assert fever["quantity"] == 2
+    assert fever["lowest_price"] == 2.5
+    assert portfolio.investments[portfolio.find("Gallery Case")]["quantity"] == 2
+
+    with open(tmp_path / "portfolio.json") as f:
+        saved = json.load(f)
+    assert [inv["item_name"] for inv in saved] == ["Fever Case", "Gallery Case"]
+    assert all("position" not in inv for inv in saved)
+
+
+def test_import_reports_oversells_in_file_order(tmp_path):
+    portfolio = make_portfolio(tmp_path)
+    rows = jsonl(
+        row(type="sell", quantity=1),
+        row(quantity=2),
+        row(type="sell", quantity=3),
+        row(type="sell", quantity=2)
+    )
+    result = import_transactions(portfolio, rows, dry_run=True)
+    assert result["valid"] == 2
+    assert [error["line"] for error in result["errors"]] == [1, 3]
+    assert portfolio.investments == []
+
+    result = import_transactions(portfolio, rows)
+    assert result["imported"] == 2
+    assert portfolio.investments[0]["quantity"] == 0
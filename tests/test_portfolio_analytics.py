@@ -0,0 +1,76 @@
+import pytest
+
+from investment_manager import InvestmentStorage, Portfolio, rebuild_position
+from portfolio_analytics import PortfolioAnalytics
+from price_history import PriceHistoryStore
+
+
+def event(kind, quantity, price, date):
+    return {"type": kind, "quantity": quantity, "price_per_case": price, "total": quantity * price, "date": date + " 00:00:00"}
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = PriceHistoryStore(str(tmp_path / "history.db"), str(tmp_path / "history.json"))
+    yield store
+    store.close()
+
+
+def make_analytics(tmp_path, history, ledgers, method="average"):
+    investments = []
+    for name, events in ledgers.items():
+        inv = {"item_name": name, "lowest_price": None, "transactions": list(events), "total_sold_value": 0.0}
+        rebuild_position(inv, method)
+        investments.append(inv)
+    portfolio = Portfolio(investments, method, InvestmentStorage(str(tmp_path / "portfolio.json")))
+    return PortfolioAnalytics(portfolio, history)
+
+
+def test_summary_leaves_unpriced_holdings_out_of_totals(tmp_path, history):
+    history.append({"Fever Case": 3.0}, date="2024-01-02")
+    analytics = make_analytics(tmp_path, history, {
+        "Fever Case": [event("buy", 2, 1.0, "2024-01-01")],
+        "Gallery Case": [event("buy", 5, 2.0, "2024-01-01"), event("sell", 1, 4.0, "2024-01-02")]
+    })
+
+    summary = analytics.summary()
+    assert summary["unpriced"] == ["Gallery Case"]
+    assert summary["totals"]["invested"] == 2.0
+    assert summary["totals"]["value"] == 6.0
+    assert summary["totals"]["unrealized_pl"] == 4.0
+    assert summary["totals"]["realized_pl"] == 2.0
+
+
+def test_timeseries_has_no_value_before_first_close(tmp_path, history):
+    history.append({"Fever Case": 2.0}, date="2024-01-01")
+    history.append({"Fever Case": 2.0, "Gallery Case": 4.0}, date="2024-01-02")
+    analytics = make_analytics(tmp_path, history, {
+        "Fever Case": [event("buy", 1, 1.0, "2024-01-01")],
+        "Gallery Case": [event("buy", 1, 3.0, "2024-01-01")]
+    })
+
+    series = analytics.timeseries()
+    assert series["dates"] == ["2024-01-01", "2024-01-02"]
+    assert series["cases"]["Gallery Case"]["value"] == [None, 4.0]
+    assert series["cases"]["Gallery Case"]["pl"] == [None, 1.0]
+    assert series["total"]["value"] == [2.0, 6.0]
+    assert series["total"]["invested"] == [1.0, 4.0]
+
+
+def test_timeseries_replays_in_ledger_order(tmp_path, history):
+    for day in ("2024-01-01", "2024-01-02", "2024-01-03"):
+        history.append({"Fever Case": 1.0}, date=day)
+    # A back-dated buy imported after a reconcile adjust: the live position replays the
+    # ledger in order, so the adjust does not swallow it.
+    analytics = make_analytics(tmp_path, history, {
+        "Fever Case": [
+            event("buy", 5, 1.0, "2024-01-01"),
+            event("adjust", 3, 1.0, "2024-01-03"),
+            event("buy", 2, 1.0, "2024-01-02")
+        ]
+    }, method="fifo")
+
+    series = analytics.timeseries()
+    quantities = series["cases"]["Fever Case"]["quantity"]
+    assert quantities == [5, 7, 5]
+    assert quantities[-1] == analytics.portfolio.investments[0]["position"]["quantity"]
@@ -0,0 +1,60 @@
+from investment_manager import MAX_CHANGE_LOG, InvestmentStorage, Portfolio, rebuild_position
+
+
+def make_portfolio(tmp_path, *names):
+    investments = []
+    for name in names:
+        inv = {"item_name": name, "transactions": [], "total_sold_value": 0.0}
+        rebuild_position(inv)
+        investments.append(inv)
+    return Portfolio(investments, storage=InvestmentStorage(str(tmp_path / "portfolio.json")))
+
+
+def test_current_revision_gets_empty_diff(tmp_path):
+    portfolio = make_portfolio(tmp_path, "Fever Case")
+    assert portfolio.diff_since(portfolio.revision) == {"changed": [], "removed": []}
+
+
+def test_unknown_or_future_revision_needs_full_list(tmp_path):
+    portfolio = make_portfolio(tmp_path, "Fever Case")
+    assert portfolio.diff_since(None) is None
+    assert portfolio.diff_since(portfolio.revision + 1) is None
+
+
+def test_diff_collects_changes_since_revision(tmp_path):
+    portfolio = make_portfolio(tmp_path, "Fever Case", "Gallery Case", "Kilowatt Case")
+    start = portfolio.record(changed=["Fever Case"])
+    portfolio.record(changed=["Gallery Case"])
+    portfolio.investments.pop(2)
+    portfolio.record(removed=["Kilowatt Case"])
+
+    diff = portfolio.diff_since(start)
+    assert [inv["item_name"] for inv in diff["changed"]] == ["Gallery Case"]
+    assert diff["removed"] == ["Kilowatt Case"]
+    assert "order" not in diff
+
+
+def test_diff_omits_derived_position(tmp_path):
+    portfolio = make_portfolio(tmp_path, "Fever Case")
+    start = portfolio.revision
+    portfolio.record(changed=["Fever Case"])
+    changed = portfolio.diff_since(start)["changed"]
+    assert changed and "position" not in changed[0]
+    assert "position" in portfolio.investments[0]
+
+
+def test_reorder_sends_order(tmp_path):
+    portfolio = make_portfolio(tmp_path, "Fever Case", "Gallery Case")
+    start = portfolio.revision
+    portfolio.investments.reverse()
+    portfolio.record(reordered=True)
+    assert portfolio.diff_since(start)["order"] == ["Gallery Case", "Fever Case"]
+    assert portfolio.find("Fever Case") == 1
+
+
+def test_revision_older_than_change_log_needs_full_list(tmp_path):
+    portfolio = make_portfolio(tmp_path, "Fever Case")
+    for _ in range(MAX_CHANGE_LOG + 2):
+        portfolio.record(changed=["Fever Case"])
+    assert portfolio.diff_since(0) is None
+    assert portfolio.diff_since(portfolio.revision - 1) is not None
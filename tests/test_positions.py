@@ -0,0 +1,128 @@
+import pytest
+
+from investment_manager import (apply_event, new_position, rebuild_position, record_adjustment,
+                                record_transaction)
+
+
+def event(kind, quantity, price, date="2024-01-01 00:00:00"):
+    return {"type": kind, "quantity": quantity, "price_per_case": price, "total": quantity * price, "date": date}
+
+
+def investment(*events, quantity=None, price=None):
+    inv = {"item_name": "Fever Case", "transactions": list(events), "total_sold_value": 0.0}
+    if quantity is not None:
+        inv["quantity"] = quantity
+        inv["purchase_price"] = price
+    return inv
+
+
+def replay(method, *events):
+    position = new_position(method)
+    for item in events:
+        apply_event(position, item)
+    return position
+
+
+def test_fifo_and_average_differ_on_partial_sell():
+    events = (event("buy", 2, 1.0), event("buy", 2, 3.0), event("sell", 3, 4.0))
+
+    fifo = replay("fifo", *events)
+    assert fifo["quantity"] == 1
+    assert fifo["cost_value"] == pytest.approx(3.0)
+    assert fifo["realized_pl"] == pytest.approx(12.0 - (1.0 + 1.0 + 3.0))
+    assert fifo["lots"] == [[1, 3.0]]
+
+    average = replay("average", *events)
+    assert average["quantity"] == 1
+    assert average["cost_value"] == pytest.approx(2.0)
+    assert average["realized_pl"] == pytest.approx(12.0 - 3 * 2.0)
+    assert average["lots"] == []
+
+    for position in (fifo, average):
+        assert position["sold_qty"] == 3
+        assert position["sold_value"] == pytest.approx(12.0)
+
+
+def test_adjust_resets_open_position_but_keeps_realized():
+    position = replay("fifo", event("buy", 4, 1.0), event("sell", 1, 2.0), event("adjust", 10, 0.5))
+    assert position["quantity"] == 10
+    assert position["cost_value"] == pytest.approx(5.0)
+    assert position["lots"] == [[10, 0.5]]
+    assert position["realized_pl"] == pytest.approx(1.0)
+
+
+def test_selling_everything_clears_cost():
+    position = replay("average", event("buy", 3, 1.0), event("sell", 3, 1.5))
+    assert position["quantity"] == 0
+    assert position["cost_value"] == 0.0
+
+
+def test_rebuild_syncs_summary_fields():
+    inv = investment(event("buy", 2, 1.0), event("buy", 2, 3.0), event("sell", 1, 5.0))
+    rebuild_position(inv, "average")
+    assert inv["quantity"] == 3
+    assert inv["purchase_price"] == pytest.approx(2.0)
+    assert inv["total_sold_value"] == pytest.approx(5.0)
+    assert inv["position"]["method"] == "average"
+
+
+def test_rebuild_reconciles_legacy_fields_once():
+    inv = investment(event("buy", 2, 1.0), quantity=5, price=2.0)
+    rebuild_position(inv, "fifo", reconcile=True)
+    assert inv["transactions"][-1]["type"] == "adjust"
+    assert inv["quantity"] == 5
+    assert inv["purchase_price"] == pytest.approx(2.0)
+
+    rebuild_position(inv, "fifo", reconcile=True)
+    assert len(inv["transactions"]) == 2
+
+
+def test_rebuild_ignores_stored_position():
+    inv = investment(event("buy", 2, 1.0))
+    inv["position"] = {**new_position("fifo"), "quantity": 99, "cost_value": 1.0}
+    rebuild_position(inv, "fifo")
+    assert inv["position"]["quantity"] == 2
+
+
+def test_record_transaction_rejects_oversell():
+    inv = investment(event("buy", 2, 1.0))
+    rebuild_position(inv, "fifo")
+    with pytest.raises(ValueError):
+        record_transaction(inv, "sell", 3, 1.0)
+    assert len(inv["transactions"]) == 1
+    assert inv["quantity"] == 2
+
+    record_transaction(inv, "sell", 2, 1.5)
+    assert inv["quantity"] == 0
+    assert inv["total_sold_value"] == pytest.approx(3.0)
+
+
+@pytest.mark.parametrize("kind, quantity, price", [
+    ("sell", -3, 1.0),
+    ("buy", 0, 1.0),
+    ("buy", 1.5, 1.0),
+    ("bogus", 1, 1.0),
+    ("adjust", 1, 1.0),
+    ("buy", 1, float("nan")),
+    ("buy", 1, float("inf")),
+    ("buy", 1, -1.0),
+])
+def test_record_transaction_rejects_invalid_entries(kind, quantity, price):
+    inv = investment(event("buy", 5, 1.0))
+    rebuild_position(inv, "average")
+    with pytest.raises(ValueError):
+        record_transaction(inv, kind, quantity, price)
+    assert len(inv["transactions"]) == 1
+    assert inv["quantity"] == 5
+
+
+def test_record_adjustment_validates_and_applies():
+    inv = investment(event("buy", 5, 1.0))
+    rebuild_position(inv, "average")
+    with pytest.raises(ValueError):
+        record_adjustment(inv, -1, 1.0)
+    with pytest.raises(ValueError):
+        record_adjustment(inv, 1, float("nan"))
+    record_adjustment(inv, 0, 0.0, date="2024-02-01 00:00:00")
+    assert inv["quantity"] == 0
+    assert inv["transactions"][-1]["date"] == "2024-02-01 00:00:00"
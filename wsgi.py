@@ -0,0 +1,31 @@
+import argparse
+import logging
+
+from app import app, price_refresher
+
+logger = logging.getLogger(__name__)
+
+# Importing this module is what a WSGI server does, so the refresher starts here rather than
+# in start_flask, which only the desktop window uses.
+price_refresher.start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Case Collector headless, without the desktop window")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8, help="Worker threads; each open /events stream holds one")
+    args = parser.parse_args()
+
+    try:
+        from waitress import serve
+    except ImportError:
+        logger.warning("waitress is not installed, falling back to Flask's threaded development server")
+        app.run(host=args.host, port=args.port, debug=False, use_reloader=False, threaded=True)
+        return
+    logger.info(f"Serving on http://{args.host}:{args.port} with {args.threads} threads")
+    serve(app, host=args.host, port=args.port, threads=args.threads)
+
+
+if __name__ == "__main__":
+    main()